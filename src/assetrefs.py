@@ -0,0 +1,59 @@
+import fnmatch
+import os
+import re
+
+from linkindex import resolve_url
+from walker import kind_dir, walk_assets
+
+# Static files copied even when no page references them, as patterns relative to the static directory
+default_asset_allowlist = ("index.css",)
+
+# Matches url(...) references and @import "..." rules in a stylesheet
+css_reference_pattern = re.compile(r"""url\(\s*(["']?)(.*?)\1\s*\)|@import\s+(["'])(.*?)\3""")
+
+
+# Function to list the URLs a stylesheet refers to, in order
+def css_references(css):
+    urls = []
+    for match in css_reference_pattern.finditer(css):
+        url = match.group(2) or match.group(4)
+        if url:
+            urls.append(url.strip())
+    return urls
+
+
+# Function to turn a path relative to the static directory into POSIX form
+def relative_asset_path(path, static_dir):
+    return os.path.relpath(path, static_dir).replace(os.sep, "/")
+
+
+# Function to find the static files the site actually uses, as POSIX paths relative to static_dir
+# targets are the site URL paths pages link to or embed (LinkIndex.referencing_pages keys);
+# allowlisted files are always kept, and stylesheets pull in the files they reference, recursively
+def referenced_static_files(static_dir, targets, allowlist=default_asset_allowlist):
+    files = set()
+    for item in walk_assets(static_dir, static_dir):
+        if item.kind != kind_dir:
+            files.add(relative_asset_path(item.source, static_dir))
+    pending = [path for path in sorted(files) if any(fnmatch.fnmatch(path, pattern) for pattern in allowlist)]
+    for url in targets:
+        path = url.lstrip("/")
+        # A directory URL is served from its index.html
+        for candidate in (path, path + "index.html" if url.endswith("/") else path + "/index.html"):
+            if candidate in files:
+                pending.append(candidate)
+    selected = set()
+    while pending:
+        path = pending.pop()
+        if path in selected:
+            continue
+        selected.add(path)
+        if not path.endswith(".css"):
+            continue
+        with open(os.path.join(static_dir, path), "r") as f:
+            css = f.read()
+        for url in css_references(css):
+            target = resolve_url(url, "/" + path)
+            if target is not None and target.lstrip("/") in files:
+                pending.append(target.lstrip("/"))
+    return selected
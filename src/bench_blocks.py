@@ -0,0 +1,43 @@
+import tempfile
+import timeit
+
+from corpus import CorpusOptions, generate_corpus
+from markdown_blocks import lines_to_block_type, markdown_to_blocks, text_to_block_type
+
+
+# Function to collect the blocks of a synthetic corpus, giving a realistic mix of block types
+def corpus_blocks(pages=100):
+    options = CorpusOptions(pages=pages, list_density=0.2, code_density=0.1, quote_density=0.1)
+    with tempfile.TemporaryDirectory() as root:
+        blocks = []
+        for path in generate_corpus(root, options):
+            with open(path) as f:
+                blocks.extend(markdown_to_blocks(f.read()))
+    return blocks
+
+
+# Function to time a classifier over every block, returning the best seconds per block
+def time_classifier(classify, blocks, repeat=5, number=10):
+    timings = timeit.repeat(lambda: [classify(block) for block in blocks], repeat=repeat, number=number)
+    return min(timings) / number / len(blocks)
+
+
+# Function to compare the table-driven classifier against the chain of startswith checks
+# The chain is timed with the line split it needs, as block_to_block_type used to do
+def main():
+    blocks = corpus_blocks()
+    counts = {}
+    for block in blocks:
+        block_type = text_to_block_type(block)
+        counts[block_type] = counts.get(block_type, 0) + 1
+    print(f"{len(blocks)} blocks: " + ", ".join(f"{count} {name}" for name, count in sorted(counts.items())))
+    chain = time_classifier(lambda block: lines_to_block_type(block.split("\n")), blocks)
+    table = time_classifier(text_to_block_type, blocks)
+    print(f"{'classifier':<12} {'ns/block':>10}")
+    print(f"{'chain':<12} {chain * 1e9:>10.1f}")
+    print(f"{'table':<12} {table * 1e9:>10.1f}")
+    print(f"speedup: {chain / table:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import timeit
+
+from inline_markdown import text_to_textnodes, text_to_textnodes_multipass
+
+# A paragraph mixing every inline element, similar to the prose in content/
+paragraph = (
+    "This is **bold text** with an *italic* word, some `inline code`, "
+    "an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev) "
+    "followed by a fairly long run of plain words that make up most real paragraphs. "
+)
+
+
+# Function to time one inline parser over a paragraph-heavy document
+def time_parser(parse, text, repeat=5, number=20):
+    timings = timeit.repeat(lambda: parse(text), repeat=repeat, number=number)
+    return min(timings) / number
+
+
+# Function to compare the single-pass scanner against the multi-pass pipeline
+def main():
+    print(f"{'paragraph x':>12} {'multipass ms':>14} {'single-pass ms':>16} {'speedup':>8}")
+    for count in [1, 10, 100, 1000]:
+        text = paragraph * count
+        multipass = time_parser(text_to_textnodes_multipass, text)
+        single_pass = time_parser(text_to_textnodes, text)
+        print(f"{count:>12} {multipass * 1000:>14.3f} {single_pass * 1000:>16.3f} {multipass / single_pass:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import contextlib
+import resource
+import sys
+import tracemalloc
+
+import inline_markdown
+import markdown_blocks
+import textnode
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+from textnode import TextNode, text_type_text
+
+
+# Dict-backed stand-in with the same attributes and methods as TextNode, used as the comparison point
+class DictTextNode:
+    __init__ = TextNode.__init__
+    __eq__ = TextNode.__eq__
+    __repr__ = TextNode.__repr__
+
+
+# Dict-backed stand-in with the same attributes and methods as HTMLNode, used as the comparison point
+class DictHTMLNode:
+    __init__ = HTMLNode.__init__
+    html_parts = HTMLNode.html_parts
+    iter_html = HTMLNode.iter_html
+    iter_minified_html = HTMLNode.iter_minified_html
+    to_html = HTMLNode.to_html
+    write_html = HTMLNode.write_html
+    props_to_html = HTMLNode.props_to_html
+
+
+# Dict-backed stand-in for LeafNode
+class DictLeafNode(DictHTMLNode):
+    html_parts = LeafNode.html_parts
+
+    def __init__(self, tag, value, props=None):
+        # LeafNode.__init__ calls super() for LeafNode, so it can't be borrowed
+        DictHTMLNode.__init__(self, tag, value, None, props)
+
+
+# Dict-backed stand-in for ParentNode
+class DictParentNode(DictHTMLNode):
+    html_parts = ParentNode.html_parts
+
+    def __init__(self, tag, children, props=None):
+        # ParentNode.__init__ calls super() for ParentNode, so it can't be borrowed
+        DictHTMLNode.__init__(self, tag, None, children, props)
+
+
+# Function to make the parser build dict-backed nodes instead of slotted ones until the block exits
+@contextlib.contextmanager
+def dict_backed_nodes():
+    replacements = [
+        (inline_markdown, "TextNode", DictTextNode),
+        (textnode, "LeafNode", DictLeafNode),
+        (markdown_blocks, "LeafNode", DictLeafNode),
+        (markdown_blocks, "ParentNode", DictParentNode),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in replacements]
+    try:
+        for module, name, cls in replacements:
+            setattr(module, name, cls)
+        yield
+    finally:
+        for module, name, cls in originals:
+            setattr(module, name, cls)
+
+
+# Function to parse a document under tracemalloc
+# Returns the bytes still held by the node tree and the peak while parsing
+def traced_parse(markdown):
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del node
+    return retained, peak
+
+
+# Function to measure the size of one node object, including its __dict__ if it has one
+def node_size(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+# Function to build a large markdown document mixing every block and inline element
+def large_document(sections=2000):
+    section = (
+        "## Section heading\n\n"
+        "A paragraph with **bold**, *italic*, `code`, a [link](/page) and an ![image](/img.png).\n"
+        "It continues on a second line of plain words.\n\n"
+        "* first item\n* second *item*\n* third item\n\n"
+        "1. one\n2. two\n3. three\n\n"
+        "> a quoted\n> line\n\n"
+    )
+    return "# Large document\n\n" + section * sections
+
+
+# Function to report per-node sizes and the memory used to parse a large document
+def main():
+    print("Per-node size in bytes (object + __dict__):")
+    print(f"  TextNode     slots: {node_size(TextNode('x', text_type_text)):>4}   dict: {node_size(DictTextNode('x', text_type_text)):>4}")
+    print(f"  HTMLNode     slots: {node_size(LeafNode('b', 'x')):>4}   dict: {node_size(DictHTMLNode('b', 'x')):>4}")
+
+    markdown = large_document()
+    slots_retained, slots_peak = traced_parse(markdown)
+    with dict_backed_nodes():
+        dict_retained, dict_peak = traced_parse(markdown)
+    print(f"Parsing a {len(markdown) / 1e6:.1f} MB document:")
+    print(f"  node tree    slots: {slots_retained / 1e6:6.1f} MB   dict: {dict_retained / 1e6:6.1f} MB")
+    print(f"  traced peak  slots: {slots_peak / 1e6:6.1f} MB   dict: {dict_peak / 1e6:6.1f} MB")
+    # ru_maxrss is reported in kilobytes on Linux
+    print(f"  process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
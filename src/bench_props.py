@@ -0,0 +1,52 @@
+import timeit
+
+from htmlnode import LeafNode, format_props
+from markdown_blocks import markdown_to_html, markdown_to_html_node
+
+# A link- and image-heavy page: navigation lists and galleries repeat the same few URLs
+link_page = "# Links\n\n" + "\n\n".join(
+    [
+        "\n".join(f"- [Section {i}](/section{i}) and [home](/)" for i in range(20)),
+        " ".join(f"![Image {i % 5}](/images/image{i % 5}.png)" for i in range(40)),
+        " ".join(f"[post {i}](/blog/post{i}?ref=nav&page={i % 3})" for i in range(40)),
+    ]
+    * 5
+)
+
+
+# Function rendering props the way HTMLNode did before: repeated += and no escaping
+def props_to_html_concat(props):
+    props_html = ""
+    for prop in props:
+        props_html += f' {prop}="{props[prop]}"'
+    return props_html
+
+
+# Function to time a callable, returning the best seconds per call
+def time_call(function, repeat=5, number=200):
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number
+
+
+# Function to compare attribute rendering before and after caching, per node and per page
+def main():
+    links = [LeafNode("a", f"post {i}", {"href": f"/blog/post{i % 50}"}) for i in range(1000)]
+    images = [LeafNode("img", "", {"src": f"/images/image{i % 5}.png", "alt": f"Image {i % 5}"}) for i in range(1000)]
+    # "escaped" is the cost of correct output without the cache, the fair point of comparison
+    print(f"{'case':<28} {'before us':>10} {'escaped us':>11} {'cached us':>10} {'vs escaped':>11}")
+    for name, nodes in [("1000 <a href>", links), ("1000 <img src alt>", images)]:
+        before = time_call(lambda: [props_to_html_concat(node.props) for node in nodes])
+        escaped = time_call(lambda: [format_props(tuple(node.props.items())) for node in nodes])
+        cached = time_call(lambda: [node.props_to_html() for node in nodes])
+        print(
+            f"{name:<28} {before * 1e6:>10.1f} {escaped * 1e6:>11.1f} {cached * 1e6:>10.1f} "
+            f"{escaped / cached:>10.2f}x"
+        )
+    # Whole-page timings include parsing, so they show the share attributes take of a render
+    tree = time_call(lambda: markdown_to_html_node(link_page).to_html(), number=50)
+    fused = time_call(lambda: markdown_to_html(link_page), number=50)
+    print(f"{'link page, node tree':<28} {'':>10} {tree * 1e6:>10.1f}")
+    print(f"{'link page, fused':<28} {'':>10} {fused * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
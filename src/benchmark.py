@@ -0,0 +1,247 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from copystatic import copy_files_recursive
+from corpus import CorpusOptions, generate_corpus
+from gencontent import extract_title
+from inline_markdown import text_to_textnodes
+from markdown_blocks import (
+    block_to_block_type,
+    block_type_paragraph,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_html_node,
+)
+from template import Template
+
+# Default location of the stored baseline timings
+# Timings only compare on the machine that recorded them, so the file is local and not committed
+baseline_path = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".bench_baseline.json")
+)
+
+# Template matching the shape of template.html
+benchmark_template = (
+    '<!DOCTYPE html> <html> <head> <meta charset="utf-8"> <title> {{ Title }} </title> '
+    '<link href="/index.css" rel="stylesheet"> </head> <body> <article> {{ Content }} </article> </body> </html>'
+)
+
+
+# Function to time a callable, returning (result, wall seconds, peak traced bytes)
+# The best of repeat runs is kept to reduce noise; memory is measured in a separate run
+# because tracemalloc slows down the code it traces
+def measure(function, repeat=1):
+    elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        run_time = time.perf_counter() - start
+        if elapsed is None or run_time < elapsed:
+            elapsed = run_time
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+# Function to run each pipeline stage over a corpus and collect its timings
+# Returns {stage name: {"seconds", "peak_bytes", "items", "bytes"}}
+def run_benchmarks(root, options, repeat=5):
+    results = {}
+
+    def record(name, function, items, size):
+        result, elapsed, peak = measure(function, repeat)
+        results[name] = {"seconds": elapsed, "peak_bytes": peak, "items": items, "bytes": size}
+        return result
+
+    paths = generate_corpus(root, options)
+    documents = []
+    for path in paths:
+        with open(path) as f:
+            documents.append(f.read())
+    total_bytes = sum(len(document) for document in documents)
+    pages = len(documents)
+
+    page_blocks = record("markdown_to_blocks", lambda: [markdown_to_blocks(d) for d in documents], pages, total_bytes)
+    blocks = [block for page in page_blocks for block in page]
+    block_bytes = sum(len(block) for block in blocks)
+    block_types = record(
+        "block_to_block_type", lambda: [block_to_block_type(b) for b in blocks], len(blocks), block_bytes
+    )
+    # Inline parsing is measured on paragraphs, joined the way paragraph_to_html_node joins them
+    inline_texts = [
+        " ".join(block.split("\n"))
+        for block, block_type in zip(blocks, block_types)
+        if block_type == block_type_paragraph
+    ]
+    record(
+        "text_to_textnodes",
+        lambda: [text_to_textnodes(text) for text in inline_texts],
+        len(inline_texts),
+        sum(len(text) for text in inline_texts),
+    )
+    nodes = record("markdown_to_html_node", lambda: [markdown_to_html_node(d) for d in documents], pages, total_bytes)
+    html = record("to_html", lambda: [node.to_html() for node in nodes], pages, total_bytes)
+    html_bytes = sum(len(page) for page in html)
+    # The fused path does both of the two stages above in one go
+    record("markdown_to_html", lambda: [markdown_to_html(d) for d in documents], pages, total_bytes)
+
+    template = Template(benchmark_template)
+    filled = record(
+        "template_fill",
+        lambda: [
+            template.render({"Title": extract_title(d), "Content": h}) for d, h in zip(documents, html)
+        ],
+        pages,
+        html_bytes,
+    )
+
+    output_dir = os.path.join(root, "public")
+
+    def write_pages():
+        for index, page in enumerate(filled):
+            dest_dir = os.path.join(output_dir, str(index % 16))
+            os.makedirs(dest_dir, exist_ok=True)
+            with open(os.path.join(dest_dir, f"{index}.html"), "w") as f:
+                f.write(page)
+
+    record("file_write", write_pages, pages, sum(len(page) for page in filled))
+
+    static_dir = os.path.join(root, "static")
+    static_bytes = 0
+    static_files = 0
+    for dir_path, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            static_files += 1
+            static_bytes += os.path.getsize(os.path.join(dir_path, filename))
+    # copy_files_recursive prints a line per file, which would dominate the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        record(
+            "copy_files_recursive",
+            lambda: copy_files_recursive(static_dir, os.path.join(root, "static_copy")),
+            static_files,
+            static_bytes,
+        )
+    return results
+
+
+# Function to print the results as a table with throughput per stage
+def print_report(results, baseline=None):
+    print(f"{'stage':<24} {'seconds':>9} {'items/s':>12} {'MB/s':>9} {'peak MB':>9} {'vs base':>8}")
+    for name, result in results.items():
+        seconds = max(result["seconds"], 1e-9)
+        line = (
+            f"{name:<24} {seconds:>9.4f} {result['items'] / seconds:>12.1f} "
+            f"{result['bytes'] / seconds / 1e6:>9.2f} {result['peak_bytes'] / 1e6:>9.2f}"
+        )
+        if baseline and name in baseline:
+            line += f" {seconds / baseline[name]['seconds']:>7.2f}x"
+        print(line)
+
+
+# Function to list the stages that got slower than the baseline by more than tolerance
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / max(baseline[name]["seconds"], 1e-9)
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+# Function to load stored baselines, keyed by a description of the corpus options
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# Function to write the baselines back to disk
+def save_baselines(path, baselines):
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=1, sort_keys=True)
+
+
+# Function to add the stages a baseline has no timing for yet, such as newly benchmarked ones
+# Returns the names of the stages added
+def extend_baseline(baseline, results):
+    added = [name for name in results if name not in baseline]
+    for name in added:
+        baseline[name] = results[name]
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the site build on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--words", type=int, default=60, help="words per paragraph")
+    parser.add_argument("--list-density", type=float, default=0.2)
+    parser.add_argument("--code-density", type=float, default=0.1)
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage; the fastest is kept")
+    parser.add_argument(
+        "--baseline",
+        default=baseline_path,
+        help="local baseline file to compare against; recorded on the first run for each corpus shape",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="replace the baseline with these results")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown before a stage counts as a regression (default: 0.25)",
+    )
+    args = parser.parse_args(argv)
+    options = CorpusOptions(
+        pages=args.pages,
+        depth=args.depth,
+        blocks_per_page=args.blocks,
+        words_per_paragraph=args.words,
+        list_density=args.list_density,
+        code_density=args.code_density,
+        link_density=args.link_density,
+        images=args.images,
+        seed=args.seed,
+    )
+    # Baselines are only comparable for the same corpus shape
+    key = json.dumps(vars(args) | {"baseline": None, "save_baseline": None, "tolerance": None, "repeat": None}, sort_keys=True)
+    baselines = load_baselines(args.baseline)
+
+    with tempfile.TemporaryDirectory() as root:
+        results = run_benchmarks(root, options, args.repeat)
+    print_report(results, baselines.get(key))
+
+    if args.save_baseline or key not in baselines:
+        # The first run on a machine becomes the baseline later runs are compared with
+        baselines[key] = results
+        save_baselines(args.baseline, baselines)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    regressions = find_regressions(results, baselines[key], args.tolerance)
+    added = extend_baseline(baselines[key], results)
+    if added:
+        save_baselines(args.baseline, baselines)
+        print(f"Added {', '.join(added)} to the baseline in {args.baseline}")
+    for name, ratio in regressions:
+        print(f"REGRESSION: {name} is {ratio:.2f}x slower than the baseline")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+# Bump this whenever the layout of the blocks table changes
+cache_format = 2
+
+
+# Class for a persistent on-disk cache mapping markdown block contents to rendered HTML
+class BlockCache:
+    def __init__(self, path, version, max_bytes=64 * 1024 * 1024):
+        # The cache lives in a SQLite database so parallel worker processes can share it
+        self.path = path
+        self.version = f"{cache_format}:{version}"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Mixed into every key; blocks render differently under each set of minify options
+        self.salt = b""
+        # Keys read since the last flush, whose last-used time is updated in one batch
+        self.used_keys = []
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            # Entries rendered by a different renderer version can't be trusted, and ones written
+            # in another format can't be read
+            self.connection.execute("DROP TABLE IF EXISTS blocks")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+        # refs holds the block's links and images as JSON, "" for none, or NULL if not recorded
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT, refs TEXT, size INTEGER, used REAL)"
+        )
+        self.connection.commit()
+
+    def key(self, block):
+        # Hash the block text; 128 bits is plenty to avoid collisions between blocks
+        return hashlib.blake2b(self.salt + block.encode(), digest_size=16).hexdigest()
+
+    def get(self, block):
+        # Return the cached HTML for a block, or None if it hasn't been rendered before
+        entry = self.lookup(block)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def lookup(self, block):
+        # Return (html, links, images) for a block, or None if it hasn't been rendered before
+        # links and images are None if the entry was stored without them
+        key = self.key(block)
+        row = self.connection.execute("SELECT html, refs FROM blocks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used_keys.append(key)
+        html, refs = row
+        if refs is None:
+            return html, None, None
+        if refs == "":
+            return html, [], []
+        links, images = json.loads(refs)
+        return html, links, images
+
+    def put(self, block, html, references=None):
+        # Store the rendered HTML for a block, and the (links, images) it renders if given
+        if references is None:
+            refs = None
+        elif references[0] or references[1]:
+            refs = json.dumps(references, separators=(",", ":"))
+        else:
+            refs = ""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?)",
+            (self.key(block), html, refs, len(html), time.time()),
+        )
+
+    def flush(self):
+        # Record last-used times for the blocks read and commit pending writes
+        if self.used_keys:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE blocks SET used = ? WHERE key = ?", [(now, key) for key in self.used_keys]
+            )
+            self.used_keys = []
+        self.connection.commit()
+
+    def evict(self):
+        # Drop the least recently used blocks until the cache fits in max_bytes
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM blocks ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM blocks WHERE key = ?", evicted)
+        self.connection.commit()
+        return len(evicted)
+
+    def close(self):
+        # Flush, trim the cache to its size bound and close the database
+        self.flush()
+        self.evict()
+        self.connection.close()
+
+    def __repr__(self):
+        # Return a string representation with the hit statistics
+        return f"BlockCache({self.path}, hits: {self.hits}, misses: {self.misses})"
@@ -0,0 +1,138 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+
+# inotify event flags, from <sys/inotify.h>
+in_modify = 0x2
+in_attrib = 0x4
+in_close_write = 0x8
+in_moved_from = 0x40
+in_moved_to = 0x80
+in_create = 0x100
+in_delete = 0x200
+in_delete_self = 0x400
+in_move_self = 0x800
+in_q_overflow = 0x4000
+in_ignored = 0x8000
+in_onlydir = 0x01000000
+in_isdir = 0x40000000
+
+# Everything that can change what a file holds, or which files a directory holds
+watch_mask = (
+    in_modify | in_attrib | in_close_write | in_moved_from | in_moved_to
+    | in_create | in_delete | in_delete_self | in_move_self | in_onlydir
+)
+
+# Layout of the fixed part of an inotify event: wd, mask, cookie, name length
+event_header = struct.Struct("iIII")
+
+
+# Class reporting the paths that changed under watched directories, using Linux inotify
+# Watching costs nothing while idle, unlike polling, which has to stat every file each time
+class InotifyNotifier:
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch descriptor -> (directory path, whether its new subdirectories are watched too)
+        self.watches = {}
+        # Directory path -> watch descriptor
+        self.descriptors = {}
+
+    def watch_tree(self, root):
+        # Watch a directory and every directory below it
+        self.add_watch(root, True)
+        for dir_path, dir_names, _ in os.walk(root):
+            for name in dir_names:
+                self.add_watch(os.path.join(dir_path, name), True)
+
+    def watch_file(self, path):
+        # Watch a single file through its parent directory; events for siblings come along and
+        # are up to the caller to ignore
+        self.add_watch(os.path.dirname(path) or ".", False)
+
+    def add_watch(self, dir_path, recursive):
+        # Start watching one directory, keeping the recursive flag if it is already watched
+        dir_path = os.path.normpath(dir_path)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), watch_mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+        previous = self.watches.get(wd)
+        self.watches[wd] = (dir_path, recursive or (previous is not None and previous[1]))
+        self.descriptors[dir_path] = wd
+
+    def remove_tree(self, root):
+        # Stop watching a directory that moved away, along with everything below it
+        prefix = os.path.join(root, "")
+        for dir_path in [path for path in self.descriptors if path == root or path.startswith(prefix)]:
+            wd = self.descriptors.pop(dir_path)
+            self.watches.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def wait(self, timeout):
+        # Block until events are pending or the timeout, in seconds, runs out
+        select.select([self.fd], [], [], timeout)
+
+    def changes(self):
+        # Return the set of paths created, changed, moved or deleted since the last call
+        # Returns None if the kernel's event queue overflowed, in which case anything may have changed
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = event_header.unpack_from(data, offset)
+                name = data[offset + event_header.size : offset + event_header.size + length].rstrip(b"\0")
+                offset += event_header.size + length
+                if mask & in_q_overflow:
+                    return None
+                if mask & in_ignored:
+                    # The directory was deleted, so its watch is gone
+                    watch = self.watches.pop(wd, None)
+                    if watch is not None and self.descriptors.get(watch[0]) == wd:
+                        del self.descriptors[watch[0]]
+                    continue
+                watch = self.watches.get(wd)
+                if watch is None:
+                    continue
+                dir_path, recursive = watch
+                if not name:
+                    # An event on the watched directory itself
+                    paths.add(dir_path)
+                    continue
+                path = os.path.join(dir_path, os.fsdecode(name))
+                paths.add(path)
+                if mask & in_isdir and recursive:
+                    if mask & (in_create | in_moved_to):
+                        # Files created in the new directory before this watch are found by
+                        # the caller rescanning the reported directory
+                        try:
+                            self.watch_tree(path)
+                        except OSError:
+                            # Already gone again; its deletion is reported next
+                            pass
+                    elif mask & in_moved_from:
+                        self.remove_tree(path)
+
+    def close(self):
+        # Stop every watch
+        os.close(self.fd)
+
+
+# Function to open a change notifier, or return None where none is available and the caller
+# has to fall back to polling
+def open_change_notifier():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        return InotifyNotifier(libc)
+    except (OSError, AttributeError):
+        return None
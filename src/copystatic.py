@@ -1,22 +1,118 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from assetrefs import relative_asset_path
+from manifest import hash_file
+from walker import kind_dir, walk_assets
+
+# Linux ioctl request number for cloning a file's extents (copy-on-write copy)
+FICLONE = 0x40049409
+
+# Ways sync_static can materialize a static file in the public directory
+transfer_methods = ("copy", "hardlink", "reflink")
 
 # Function to copy files and directories recursively from source to destination
-def copy_files_recursive(source_dir_path, dest_dir_path):
+# When only is given, just the files whose POSIX path relative to the source is in it are copied
+# Incremental builds use sync_static instead, which skips files unchanged since the last build
+def copy_files_recursive(source_dir_path, dest_dir_path, only=None):
     # Check if the destination directory exists, if not, create it
     if not os.path.exists(dest_dir_path):
         os.mkdir(dest_dir_path)
 
-    # Iterate through all items in the source directory
-    for filename in os.listdir(source_dir_path):
-        # Construct full path for source and destination
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        # Check if the item is a file
-        if os.path.isfile(from_path):
-            # Copy the file to the destination
-            shutil.copy(from_path, dest_path)
+    # Iterate through every directory and file under the source directory
+    for item in walk_assets(source_dir_path, dest_dir_path):
+        if item.kind == kind_dir:
+            if only is not None:
+                # Directories are created by copy_file, so ones with nothing selected stay out
+                continue
+            print(f" * {item.source} -> {item.dest}")
+            # Directories are yielded before their contents, so create them here
+            if not os.path.exists(item.dest):
+                os.mkdir(item.dest)
+            continue
+        if only is not None and relative_asset_path(item.source, source_dir_path) not in only:
+            continue
+        # Copy the file to the destination
+        copy_file(item.source, item.dest)
+
+# Function to copy a single static file, creating its destination directory if needed
+def copy_file(from_path, dest_path):
+    print(f" * {from_path} -> {dest_path}")
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    shutil.copy(from_path, dest_path)
+
+# Function to bring the public directory's static files in line with the static directory
+# Files whose size and mtime (or content hash, with checksum=True) match the manifest are
+# skipped; orphans, including files left out by only, are left for manifest.remove_stale to delete
+def sync_static(source_dir_path, dest_dir_path, manifest, method="copy", checksum=False, workers=None, only=None):
+    if method not in transfer_methods:
+        raise ValueError(f"Invalid transfer method: {method}")
+    transfers = []
+    unchanged = 0
+    for item in walk_assets(source_dir_path, dest_dir_path):
+        if item.kind == kind_dir:
+            continue
+        if only is not None and relative_asset_path(item.source, source_dir_path) not in only:
+            continue
+        stat = item.stat()
+        entry = {"source": item.source, "method": method, "size": stat.st_size}
+        if checksum:
+            entry["hash"] = hash_file(item.source)
         else:
-            # If the item is a directory, call the function recursively
-            copy_files_recursive(from_path, dest_path)
+            entry["mtime_ns"] = stat.st_mtime_ns
+        if manifest.is_fresh("static", item.dest, entry):
+            unchanged += 1
+        else:
+            transfers.append((item.source, item.dest))
+        manifest.record("static", item.dest, entry)
+
+    # Create each destination directory once before the transfers start
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path in transfers}):
+        os.makedirs(dest_dir, exist_ok=True)
+    # Transfers are I/O bound, so threads overlap them well
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(transfer_file, from_path, dest_path, method)
+            for from_path, dest_path in transfers
+        ]
+        # Re-raise the first transfer error, if any
+        for future in futures:
+            future.result()
+    print(f" * {len(transfers)} static files synced, {unchanged} unchanged")
+    return transfers
+
+# Function to place one static file at dest_path by copying, hardlinking or cloning it
+def transfer_file(from_path, dest_path, method):
+    # Unlink the old output first: os.link refuses to replace a file, and writing through a
+    # previous hardlink would modify the source itself
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if method == "hardlink":
+        try:
+            os.link(from_path, dest_path)
+            return
+        except OSError:
+            # Different filesystems can't share an inode, so fall back to a copy
+            pass
+    elif method == "reflink" and reflink_file(from_path, dest_path):
+        return
+    # copy2 keeps the mtime, so the next sync can compare against it cheaply
+    shutil.copy2(from_path, dest_path)
+
+# Function to clone a file with copy-on-write where the filesystem supports it
+# Returns False when cloning isn't possible so the caller can copy instead
+def reflink_file(from_path, dest_path):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        return False
+    shutil.copystat(from_path, dest_path)
+    return True
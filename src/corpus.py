@@ -0,0 +1,128 @@
+import os
+import random
+
+# Words used to fill synthetic paragraphs
+vocabulary = (
+    "the quick brown fox jumps over lazy dog elves dwarves hobbits wizard ring mountain "
+    "river forest shire journey fellowship king return shadow light ancient song"
+).split()
+
+
+# Class describing the shape of a synthetic content tree
+class CorpusOptions:
+    def __init__(
+        self,
+        pages=100,
+        depth=2,
+        fanout=4,
+        blocks_per_page=20,
+        words_per_paragraph=60,
+        list_density=0.2,
+        code_density=0.1,
+        quote_density=0.05,
+        link_density=0.05,
+        images=10,
+        image_size=64 * 1024,
+        seed=0,
+    ):
+        self.pages = pages  # Number of markdown pages to generate
+        self.depth = depth  # Maximum directory nesting below the content root
+        self.fanout = fanout  # Subdirectories per directory
+        self.blocks_per_page = blocks_per_page  # Blocks after the title; controls page size
+        self.words_per_paragraph = words_per_paragraph
+        self.list_density = list_density  # Share of blocks that are lists
+        self.code_density = code_density  # Share of blocks that are code blocks
+        self.quote_density = quote_density  # Share of blocks that are quotes
+        self.link_density = link_density  # Chance that a word becomes inline markup
+        self.images = images  # Number of static image files
+        self.image_size = image_size  # Bytes per static image file
+        self.seed = seed
+
+    def __repr__(self):
+        # Return a string representation of the options
+        return f"CorpusOptions({self.__dict__})"
+
+
+# Function to pick the relative directory for page number index
+def page_directory(index, options):
+    parts = []
+    for level in range(options.depth):
+        if index % (level + 2) == 0:
+            break
+        parts.append(f"section{(index // (level + 1)) % options.fanout}")
+    return os.path.join(*parts) if parts else ""
+
+
+# Function to build a paragraph with inline formatting, links and images
+def generate_paragraph(rng, options, page_urls):
+    words = []
+    for _ in range(options.words_per_paragraph):
+        word = rng.choice(vocabulary)
+        if rng.random() < options.link_density:
+            kind = rng.randrange(5)
+            if kind == 0:
+                word = f"**{word}**"
+            elif kind == 1:
+                word = f"*{word}*"
+            elif kind == 2:
+                word = f"`{word}`"
+            elif kind == 3:
+                word = f"[{word}]({rng.choice(page_urls)})"
+            elif options.images:
+                word = f"![{word}](/images/image{rng.randrange(options.images)}.png)"
+        words.append(word)
+    # Wrap the paragraph over several lines like hand-written markdown
+    lines = [" ".join(words[i : i + 12]) for i in range(0, len(words), 12)]
+    return "\n".join(lines)
+
+
+# Function to build one block of a randomly chosen type
+def generate_block(rng, options, page_urls):
+    roll = rng.random()
+    if roll < options.list_density:
+        items = [" ".join(rng.choice(vocabulary) for _ in range(6)) for _ in range(rng.randint(2, 8))]
+        if rng.random() < 0.5:
+            return "\n".join(f"* {item}" for item in items)
+        return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+    roll -= options.list_density
+    if roll < options.code_density:
+        lines = [" ".join(rng.choice(vocabulary) for _ in range(5)) for _ in range(rng.randint(2, 10))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    roll -= options.code_density
+    if roll < options.quote_density:
+        return "\n".join(f"> {rng.choice(vocabulary)} {rng.choice(vocabulary)}" for _ in range(3))
+    if rng.random() < 0.1:
+        return f"## {rng.choice(vocabulary).title()} {rng.choice(vocabulary)}"
+    return generate_paragraph(rng, options, page_urls)
+
+
+# Function to write a synthetic site (content pages and static images) under root
+# Returns the list of generated markdown paths
+def generate_corpus(root, options=None):
+    options = options or CorpusOptions()
+    rng = random.Random(options.seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    relative_paths = []
+    for index in range(options.pages):
+        relative_paths.append(os.path.join(page_directory(index, options), f"page{index}.md"))
+    page_urls = ["/" + path[: -len(".md")] for path in relative_paths]
+
+    paths = []
+    for index, relative_path in enumerate(relative_paths):
+        blocks = [f"# Page {index}"]
+        for _ in range(options.blocks_per_page):
+            blocks.append(generate_block(rng, options, page_urls))
+        path = os.path.join(content_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("\n\n".join(blocks) + "\n")
+        paths.append(path)
+
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+    for index in range(options.images):
+        with open(os.path.join(static_dir, "images", f"image{index}.png"), "wb") as f:
+            f.write(rng.randbytes(options.image_size))
+    return paths
@@ -0,0 +1,96 @@
+import os
+
+from inline_markdown import image_pattern, link_pattern
+from template import load_template
+
+
+# Function to list the site-local static assets (URLs starting with a single "/") a markdown page uses
+# Every image counts; links count only when they name a file other than a page, like /files/a.pdf
+# Query strings and fragments are dropped since they don't name a different file
+def referenced_assets(markdown):
+    urls = []
+    for pattern in (image_pattern, link_pattern):
+        for match in pattern.finditer(markdown):
+            url = match.group(2).split("#", 1)[0].split("?", 1)[0]
+            if not url.startswith("/") or url.startswith("//") or url in urls:
+                continue
+            extension = os.path.splitext(url)[1]
+            if pattern is link_pattern and extension in ("", ".html"):
+                continue
+            urls.append(url)
+    return urls
+
+
+# Function to map a site URL to the file under the static directory it would be served from
+def url_to_static_path(url, static_dir):
+    return os.path.normpath(os.path.join(static_dir, url.lstrip("/")))
+
+
+# Function to list every file a page is built from besides its markdown:
+# the template, the partials it includes and the static assets the page references
+def page_dependencies(markdown, template_path, static_dir):
+    dependencies = list(load_template(template_path).dependencies)
+    for url in referenced_assets(markdown):
+        dependencies.append(url_to_static_path(url, static_dir))
+    return dependencies
+
+
+# Class recording which files each page depends on, with a reverse index for invalidation
+class DependencyGraph:
+    def __init__(self):
+        # page -> set of files it depends on, and file -> set of pages depending on it
+        # Every path is normalized so "./template.html" and "template.html" are the same node
+        self.dependencies = {}
+        self.dependents = {}
+
+    @classmethod
+    def from_manifest(cls, manifest, static_dir):
+        # Rebuild the graph recorded by an incremental build's manifest
+        graph = cls()
+        for entry in manifest.entries["pages"].values():
+            dependencies = list(entry.get("dependencies", {}))
+            for url in entry.get("assets", []):
+                dependencies.append(url_to_static_path(url, static_dir))
+            graph.set_dependencies(entry["source"], dependencies)
+        return graph
+
+    def set_dependencies(self, page, dependencies):
+        # Replace the recorded dependencies of a page
+        page = os.path.normpath(page)
+        self.remove_page(page)
+        dependencies = {os.path.normpath(path) for path in dependencies}
+        self.dependencies[page] = dependencies
+        for path in dependencies:
+            self.dependents.setdefault(path, set()).add(page)
+
+    def remove_page(self, page):
+        # Forget a page and drop it from the reverse index
+        page = os.path.normpath(page)
+        for path in self.dependencies.pop(page, ()):
+            pages = self.dependents[path]
+            pages.discard(page)
+            if not pages:
+                del self.dependents[path]
+
+    def dependencies_of(self, page):
+        # Return the sorted files a page depends on
+        return sorted(self.dependencies.get(os.path.normpath(page), ()))
+
+    def affected_by(self, *paths):
+        # Return the sorted pages that must rebuild when any of the given files change
+        # A page is affected by changes to its own markdown as well as to its dependencies
+        affected = set()
+        for path in paths:
+            path = os.path.normpath(path)
+            if path in self.dependencies:
+                affected.add(path)
+            affected.update(self.dependents.get(path, ()))
+        return sorted(affected)
+
+    def files(self):
+        # Return every file some page depends on
+        return sorted(self.dependents)
+
+    def __repr__(self):
+        # Return a string representation with the number of pages and files tracked
+        return f"DependencyGraph({len(self.dependencies)} pages, {len(self.dependents)} files)"
@@ -0,0 +1,220 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from changenotifier import open_change_notifier
+from copystatic import copy_file
+from depgraph import DependencyGraph, page_dependencies
+from gencontent import generate_page
+from manifest import prune_empty_dirs
+from walker import kind_asset, kind_dir, walk_tree
+
+
+# Function to record (mtime, size) for every file under the given files and directories
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        if not os.path.isdir(path):
+            # A deleted file, such as a removed partial; its absence is reported as a removal
+            continue
+        for item in walk_tree(path, path, kind_asset):
+            if item.kind == kind_dir:
+                continue
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                # Deleted between listing and stat; the next poll reports it as removed
+                continue
+            state[item.source] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+# Class that watches the site sources and rebuilds only the outputs affected by each change
+# Changes come from the OS change notifier where there is one, so only the touched files are
+# stat'ed; otherwise every poll stats every source
+class SiteWatcher:
+    def __init__(self, content_dir, static_dir, template_path, public_dir, notify=True):
+        # Source locations to watch and the directory the outputs are written to
+        # Paths are normalized so they match the nodes of the dependency graph
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.public_dir = public_dir
+        # What each page was built from, so a change rebuilds exactly the pages depending on it
+        self.graph = DependencyGraph()
+        for item in walk_tree(self.content_dir, self.content_dir, kind_asset):
+            if item.kind != kind_dir:
+                self.update_dependencies(item.source)
+        self.notifier = open_change_notifier() if notify else None
+        # Watches go in before the snapshot, so nothing saved in between is missed
+        self.watch_paths(self.watched_paths())
+        self.state = snapshot(self.watched_paths())
+
+    def watched_paths(self):
+        # Every source the site is built from, including partials outside the watched directories
+        paths = [self.content_dir, self.static_dir, self.template_path]
+        for path in self.graph.files():
+            if not (self.is_content(path) or self.is_static(path) or path in paths):
+                paths.append(path)
+        return paths
+
+    def watch_paths(self, paths):
+        # Register sources with the change notifier, falling back to polling if it runs out of watches
+        if self.notifier is None:
+            return
+        try:
+            for path in paths:
+                if os.path.isdir(path):
+                    self.notifier.watch_tree(path)
+                else:
+                    self.notifier.watch_file(path)
+        except OSError as e:
+            print(f" ! change notifications unavailable, polling instead: {e}")
+            self.notifier.close()
+            self.notifier = None
+
+    def is_watched(self, path, watched):
+        # Check if a reported path is a source; sibling files of watched ones are reported too
+        return path in watched or self.is_content(path) or self.is_static(path)
+
+    def refresh(self, paths):
+        # Re-stat only the given paths, and everything below those that are directories
+        # Returns the (changed, removed) source paths and updates the snapshot in place
+        changed = []
+        removed = []
+        for path in paths:
+            if path in self.state or os.path.isfile(path):
+                old = {path: self.state[path]} if path in self.state else {}
+            else:
+                # A directory that appeared, moved or vanished, with whatever it held
+                prefix = os.path.join(path, "")
+                old = {source: stamp for source, stamp in self.state.items() if source.startswith(prefix)}
+            new = snapshot([path])
+            for source in old:
+                if source not in new:
+                    removed.append(source)
+                    del self.state[source]
+            for source, stamp in new.items():
+                if old.get(source) != stamp:
+                    changed.append(source)
+                    self.state[source] = stamp
+        return changed, removed
+
+    def update_dependencies(self, path):
+        # Re-read a page's template and asset references into the graph
+        try:
+            with open(path, "r") as f:
+                markdown = f.read()
+            dependencies = page_dependencies(markdown, self.template_path, self.static_dir)
+        except (OSError, ValueError):
+            # Without a readable template the page still depends on its path
+            dependencies = [self.template_path]
+        self.graph.set_dependencies(path, dependencies)
+
+    def poll(self):
+        # Compare the sources against the previous snapshot and rebuild what changed
+        # Returns the list of changed or removed source paths
+        watched = self.watched_paths()
+        touched = self.notifier.changes() if self.notifier is not None else None
+        if touched is not None:
+            changed, removed = self.refresh(sorted(path for path in touched if self.is_watched(path, watched)))
+        else:
+            # No notifier, or its event queue overflowed: compare every source, and watch any
+            # directories created while events were being dropped
+            self.watch_paths(watched)
+            new_state = snapshot(watched)
+            changed = [path for path in new_state if self.state.get(path) != new_state[path]]
+            removed = [path for path in self.state if path not in new_state]
+            self.state = new_state
+        for path in changed:
+            if self.is_static(path):
+                self.rebuild(path)
+        for path in removed:
+            self.remove_output(path)
+            if self.is_content(path):
+                self.graph.remove_page(path)
+        # Rebuild edited pages and the pages depending on a changed template, partial or asset
+        pages = self.graph.affected_by(*changed, *removed)
+        pages.extend(path for path in changed if self.is_content(path) and path not in pages)
+        for path in sorted(pages):
+            self.update_dependencies(path)
+            self.rebuild(path)
+        # Start watching partials the rebuilt pages picked up
+        added = [path for path in self.watched_paths() if path not in watched]
+        self.watch_paths(added)
+        self.state.update(snapshot(added))
+        return changed + removed
+
+    def is_content(self, path):
+        # Check if a path is a markdown page under the content directory
+        return path.startswith(os.path.join(self.content_dir, ""))
+
+    def is_static(self, path):
+        # Check if a path is an asset under the static directory
+        return path.startswith(os.path.join(self.static_dir, ""))
+
+    def output_path(self, path):
+        # Map a content or static source to its file in the public directory
+        if self.is_content(path):
+            relative = os.path.relpath(path, self.content_dir)
+            return os.path.splitext(os.path.join(self.public_dir, relative))[0] + ".html"
+        return os.path.join(self.public_dir, os.path.relpath(path, self.static_dir))
+
+    def rebuild(self, path):
+        # Regenerate one page or recopy one asset, reporting errors without stopping the watch
+        try:
+            if self.is_content(path):
+                generate_page(path, self.template_path, self.output_path(path))
+            elif self.is_static(path):
+                copy_file(path, self.output_path(path))
+        except Exception as e:
+            print(f" ! {path}: {e}")
+
+    def remove_output(self, path):
+        # Delete the output of a source file that no longer exists
+        if not (self.is_content(path) or self.is_static(path)):
+            return
+        dest_path = self.output_path(path)
+        if os.path.exists(dest_path):
+            print(f" * removed {dest_path}")
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), self.public_dir)
+
+    def close(self):
+        # Release the change notifier
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+
+    def watch(self, interval=0.05):
+        # Poll forever, rebuilding changed sources as they are saved
+        # With a notifier, each wait ends as soon as a change arrives
+        while True:
+            start = time.perf_counter()
+            try:
+                changed = self.poll()
+            except FileNotFoundError:
+                # A directory vanished mid-scan; the next poll sees the settled tree
+                changed = []
+            if changed:
+                print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+            if self.notifier is not None:
+                self.notifier.wait(interval)
+            else:
+                time.sleep(interval)
+
+
+# Function to serve the public directory over HTTP from a background thread
+def serve(public_dir, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=public_dir)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {public_dir} at http://localhost:{port}/")
+    return server
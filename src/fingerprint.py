@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from assetrefs import css_reference_pattern, relative_asset_path
+from linkindex import resolve_url
+from manifest import hash_file
+from outputwriter import write_output
+from walker import kind_dir, walk_assets
+
+# Number of hex digits of the content hash put in fingerprinted file names
+fingerprint_length = 10
+
+# Name of the file in the public directory mapping each asset URL to its fingerprinted URL
+asset_manifest_name = "asset-manifest.json"
+
+# Matches src="..." and href="..." attributes in a template
+attribute_url_pattern = re.compile(r"""\b(src|href)=(["'])(.*?)\2""")
+
+# Original asset URL -> fingerprinted URL used while rendering, and a digest identifying the mapping
+asset_urls = {}
+asset_urls_digest = b""
+
+
+# Function to set the asset URLs pages and templates are rendered with; an empty mapping disables it
+def set_asset_urls(urls):
+    global asset_urls, asset_urls_digest
+    asset_urls = dict(urls)
+    if asset_urls:
+        asset_urls_digest = hashlib.blake2b(json.dumps(asset_urls, sort_keys=True).encode(), digest_size=8).digest()
+    else:
+        asset_urls_digest = b""
+
+
+# Function to map a URL to its fingerprinted form; URLs that aren't fingerprinted assets are kept
+def rewrite_url(url):
+    return asset_urls.get(url, url)
+
+
+# Function to list the src and href attribute URLs of an HTML source
+def attribute_urls(source):
+    return [match.group(3) for match in attribute_url_pattern.finditer(source)]
+
+
+# Function to rewrite the src and href attributes of an HTML source to fingerprinted URLs
+def rewrite_attribute_urls(source):
+    if not asset_urls:
+        return source
+    return attribute_url_pattern.sub(
+        lambda match: f"{match.group(1)}={match.group(2)}{rewrite_url(match.group(3))}{match.group(2)}", source
+    )
+
+
+# Function to insert a content hash before a file's extension: images/a.png -> images/a.<hash>.png
+def fingerprint_name(relative_path, digest):
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:fingerprint_length]}{extension}"
+
+
+# Class holding the fingerprinted name and content hash of every static file
+class AssetFingerprints:
+    def __init__(self):
+        # relative path -> (fingerprinted relative path, content hash, rewritten bytes or None)
+        # Paths are POSIX and relative to the static directory
+        self.assets = {}
+
+    def urls(self):
+        # Return original URL -> fingerprinted URL for every asset
+        return {"/" + path: "/" + output for path, (output, _, _) in self.assets.items()}
+
+    def output_path(self, relative_path):
+        # Return the fingerprinted path of an asset
+        return self.assets[relative_path][0]
+
+    def __repr__(self):
+        # Return a string representation with the number of assets
+        return f"AssetFingerprints({len(self.assets)} assets)"
+
+
+# Function to hash every static file and pick its fingerprinted name
+# Hashes are cached in cache_path by size and mtime, and stale ones are computed in a thread
+# pool; stylesheets have their url() and @import references rewritten to fingerprinted URLs
+# first, so their own hash changes whenever an asset they use changes
+def fingerprint_assets(static_dir, cache_path=None, workers=None):
+    cache = load_hash_cache(cache_path)
+    files = {}
+    for item in walk_assets(static_dir, static_dir):
+        if item.kind != kind_dir:
+            stat = item.stat()
+            relative = relative_asset_path(item.source, static_dir)
+            files[relative] = (item.source, stat.st_size, stat.st_mtime_ns)
+
+    fingerprints = AssetFingerprints()
+    stale = []
+    for relative, (source, size, mtime_ns) in files.items():
+        if relative.endswith(".css"):
+            continue
+        cached = cache.get(relative)
+        if cached is not None and cached[0] == size and cached[1] == mtime_ns:
+            fingerprints.assets[relative] = (fingerprint_name(relative, cached[2]), cached[2], None)
+        else:
+            stale.append(relative)
+    # hashlib releases the GIL on large buffers, so threads hash files in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = executor.map(hash_file, [files[relative][0] for relative in stale])
+        for relative, digest in zip(stale, digests):
+            fingerprints.assets[relative] = (fingerprint_name(relative, digest), digest, None)
+
+    for relative in sorted(files):
+        if relative.endswith(".css"):
+            fingerprint_stylesheet(relative, files, fingerprints, ())
+
+    if cache_path is not None:
+        save_hash_cache(cache_path, files, fingerprints)
+    return fingerprints
+
+
+# Function to rewrite and fingerprint a stylesheet after the stylesheets it imports
+# including holds the stylesheets being processed up the import chain, to stop at cycles
+def fingerprint_stylesheet(relative, files, fingerprints, including):
+    if relative in fingerprints.assets or relative in including:
+        return
+    with open(files[relative][0], "r") as f:
+        css = f.read()
+    including = including + (relative,)
+
+    def rewrite(match):
+        url = match.group(2) if match.group(2) is not None else match.group(4)
+        target = resolve_url(url.strip(), "/" + relative) if url.strip() else None
+        if target is None or target[1:] not in files:
+            return match.group(0)
+        target = target[1:]
+        if target.endswith(".css"):
+            fingerprint_stylesheet(target, files, fingerprints, including)
+        if target not in fingerprints.assets:
+            # Part of an import cycle; leave the reference as written
+            return match.group(0)
+        new_url = "/" + fingerprints.output_path(target)
+        if match.group(2) is not None:
+            return f"url({match.group(1)}{new_url}{match.group(1)})"
+        return f"@import {match.group(3)}{new_url}{match.group(3)}"
+
+    data = css_reference_pattern.sub(rewrite, css).encode()
+    digest = hashlib.sha256(data).hexdigest()
+    fingerprints.assets[relative] = (fingerprint_name(relative, digest), digest, data)
+
+
+# Function to load cached hashes as relative path -> [size, mtime_ns, hash]
+def load_hash_cache(cache_path):
+    if cache_path is None:
+        return {}
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+# Function to save the hashes of every non-stylesheet asset for the next build
+def save_hash_cache(cache_path, files, fingerprints):
+    cache = {}
+    for relative, (_, size, mtime_ns) in files.items():
+        if not relative.endswith(".css"):
+            cache[relative] = [size, mtime_ns, fingerprints.assets[relative][1]]
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+# Function to place fingerprinted assets in the public directory and write the asset manifest
+# Fingerprinted names never change content, so files already in place are left alone; with a
+# manifest, outputs are recorded so old fingerprints are pruned by remove_stale
+# only, if given, limits publishing to those relative paths
+def publish_assets(static_dir, public_dir, fingerprints, manifest=None, only=None):
+    published = 0
+    for relative in sorted(fingerprints.assets):
+        if only is not None and relative not in only:
+            continue
+        output, digest, data = fingerprints.assets[relative]
+        source = os.path.join(static_dir, relative)
+        dest_path = os.path.join(public_dir, output)
+        if manifest is not None:
+            manifest.record("static", dest_path, {"source": source, "hash": digest})
+        if os.path.exists(dest_path):
+            continue
+        print(f" * {source} -> {dest_path}")
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if data is not None:
+            write_output(dest_path, data)
+        else:
+            shutil.copy2(source, dest_path)
+        published += 1
+    urls = fingerprints.urls()
+    if only is not None:
+        urls = {url: output for url, output in urls.items() if url[1:] in only}
+    write_output(
+        os.path.join(public_dir, asset_manifest_name),
+        json.dumps(urls, indent=1, sort_keys=True).encode(),
+    )
+    print(f" * {published} fingerprinted assets published, {len(urls) - published} already in place")
+    return published
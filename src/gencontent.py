@@ -1,56 +1,278 @@
+import functools
+import hashlib
 import os
-from pathlib import Path
-from markdown_blocks import markdown_to_html_node
-
-# Function to recursively generate HTML pages from markdown content
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    # Iterate over each item in the content directory
-    for filename in os.listdir(dir_path_content):
-        # Construct the full source and destination paths
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        # Check if the current item is a file
-        if os.path.isfile(from_path):
-            # Change the extension of the destination file to .html
-            dest_path = Path(dest_path).with_suffix(".html")
-            # Generate the HTML page
-            generate_page(from_path, template_path, dest_path)
+import time
+from concurrent.futures import ProcessPoolExecutor
+from blockcache import BlockCache
+from depgraph import referenced_assets
+import fingerprint
+from markdown_blocks import HTMLBuffer, markdown_to_buffer, renderer_version
+from outputwriter import OutputWriter, write_stream
+from profiler import emit, hooks_active
+from template import load_template
+from walker import walk_pages
+
+# Block render cache shared by every page rendered in this process, if enabled
+block_cache = None
+
+# Site-wide index of each generated page's links and images, if enabled
+link_index = None
+
+# Whether pages are minified, and whether minified pages leave out optional end tags
+minify_html = False
+omit_end_tags = False
+
+
+# Exception raised when one or more pages fail to build, carrying every failure
+class PageBuildError(Exception):
+    def __init__(self, failures):
+        # failures is a list of (source path, error message) pairs in discovery order
+        self.failures = failures
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        for from_path, message in failures:
+            lines.append(f" * {from_path}: {message}")
+        super().__init__("\n".join(lines))
+
+# Function to generate HTML pages for every markdown file under the content directory
+# When a manifest is given, pages whose markdown, template and partials are unchanged are skipped
+# Rendered pages are handed to a pool of writer threads so rendering overlaps the file I/O
+# With a shard (i, N), only that shard's share of the pages is generated
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, write_workers=4, shard=None):
+    sources = {}
+    failures = []
+    with OutputWriter(write_workers) as writer:
+        # Pages stream in from an iterative walk of the content tree
+        for item in walk_pages(dir_path_content, dest_dir_path, shard):
+            sources[item.dest] = item.source
+            try:
+                if manifest is None:
+                    # Generate the HTML page
+                    generate_page(item.source, template_path, item.dest, writer)
+                else:
+                    # Generate the HTML page only if its inputs changed since the last build
+                    generate_page_incremental(item.source, template_path, item.dest, manifest, writer)
+            except Exception as e:
+                # A page that fails to render doesn't stop the others
+                print(f" ! {item.source}: {e}")
+                failures.append((item.source, f"{type(e).__name__}: {e}"))
+                if manifest is not None:
+                    # The old output is still in place, so make sure the page is rebuilt next time
+                    manifest.invalidate("pages", item.dest)
+    print(f" * {writer.written} pages written, {writer.unchanged} unchanged")
+    for dest_path, e in writer.errors:
+        if manifest is not None:
+            manifest.invalidate("pages", dest_path)
+        failures.append((sources[dest_path], f"{type(e).__name__}: {e}"))
+    if failures:
+        # Report render and write failures together in discovery order
+        order = {from_path: index for index, from_path in enumerate(sources.values())}
+        failures.sort(key=lambda failure: order[failure[0]])
+        raise PageBuildError(failures)
+
+# Function to regenerate a page only when its source or a dependency's hash changed
+def generate_page_incremental(from_path, template_path, dest_path, manifest, writer=None):
+    entry = page_entry(from_path, template_path, manifest)
+    if not manifest.is_fresh("pages", dest_path, entry):
+        generate_page(from_path, template_path, dest_path, writer)
+    manifest.record("pages", dest_path, entry)
+
+# Function to build the manifest entry describing the inputs of a page
+# "dependencies" hashes the template and its partials; "assets" lists the local URLs the page
+# references, which DependencyGraph.from_manifest maps back to static files
+# With asset fingerprinting, "fingerprints" holds the fingerprinted URLs the page and template
+# point at, so a page is rebuilt exactly when one of its assets gets a new name
+def page_entry(from_path, template_path, manifest):
+    with open(from_path, "rb") as f:
+        data = f.read()
+    template = load_template(template_path, minify_html, omit_end_tags)
+    assets = referenced_assets(data.decode())
+    entry = {
+        "source": str(from_path),
+        "source_hash": hashlib.sha256(data).hexdigest(),
+        "dependencies": {path: manifest.file_hash(path) for path in template.dependencies},
+        "assets": assets,
+    }
+    if fingerprint.asset_urls:
+        urls = assets + template.references
+        entry["fingerprints"] = {url: fingerprint.asset_urls[url] for url in urls if url in fingerprint.asset_urls}
+    if minify_html:
+        # Switching minification on or off rewrites every page
+        entry["minify"] = {"omit_end_tags": omit_end_tags}
+    return entry
+
+# Function to enable the persistent block render cache for pages rendered in this process
+# Also used as the worker initializer so each pool process opens its own connection
+def open_block_cache(path, max_bytes):
+    global block_cache
+    block_cache = BlockCache(path, renderer_version, max_bytes)
+    return block_cache
+
+# Function to set up a worker process: the fingerprinted asset URLs and minify options, then
+# the block cache if enabled
+def init_worker(asset_urls, minify_args, cache_args):
+    fingerprint.set_asset_urls(asset_urls)
+    set_minify(*minify_args)
+    if cache_args is not None:
+        open_block_cache(*cache_args)
+
+# Function to flush, trim and disable the block render cache
+def close_block_cache():
+    global block_cache
+    if block_cache is not None:
+        block_cache.close()
+        block_cache = None
+
+# Function to list every (markdown path, html path) pair under the content directory, or in a shard
+def discover_pages(dir_path_content, dest_dir_path, shard=None):
+    return [(item.source, item.dest) for item in walk_pages(dir_path_content, dest_dir_path, shard)]
+
+# Function to yield the pages that need rendering, recording fresh ones in the manifest
+# Yields (markdown path, html path, manifest entry or None)
+def pages_to_render(dir_path_content, template_path, dest_dir_path, manifest, shard=None):
+    for item in walk_pages(dir_path_content, dest_dir_path, shard):
+        if manifest is None:
+            yield item.source, item.dest, None
+            continue
+        entry = page_entry(item.source, template_path, manifest)
+        if manifest.is_fresh("pages", item.dest, entry):
+            manifest.record("pages", item.dest, entry)
         else:
-            # If the item is a directory, call this function recursively
-            generate_pages_recursive(from_path, template_path, dest_path)
+            yield item.source, item.dest, entry
+
+# Function to generate all pages using a pool of worker processes
+# workers defaults to the number of CPUs; a failing page doesn't stop the others
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path, workers=None, manifest=None, shard=None):
+    failures = []
+    cache_args = None
+    if block_cache is not None:
+        cache_args = (block_cache.path, block_cache.max_bytes)
+    initargs = (fingerprint.asset_urls, (minify_html, omit_end_tags), cache_args)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as executor:
+        # Pages are submitted as the walk discovers them, so rendering starts right away
+        pages = []
+        futures = []
+        for from_path, dest_path, entry in pages_to_render(
+            dir_path_content, template_path, dest_dir_path, manifest, shard
+        ):
+            pages.append((from_path, dest_path, entry))
+            futures.append(executor.submit(render_page, from_path, template_path, dest_path, hooks_active()))
+        # Collect results in discovery order so the log reads the same on every run
+        for (from_path, dest_path, entry), future in zip(pages, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f" ! {from_path}: {e}")
+                failures.append((from_path, f"{type(e).__name__}: {e}"))
+                if manifest is not None:
+                    # Keep the previous output and entry so the page is retried next build
+                    manifest.retain("pages", dest_path)
+                continue
+            print(f" * {from_path} {template_path} -> {dest_path}")
+            finish_page(dest_path, result)
+            if manifest is not None:
+                manifest.record("pages", dest_path, entry)
+    if failures:
+        raise PageBuildError(failures)
 
 # Function to generate an HTML page from a markdown file and a template
-def generate_page(from_path, template_path, dest_path):
+# With a writer, the page is queued for writing instead of written before returning
+def generate_page(from_path, template_path, dest_path, writer=None):
     # Log the file paths being processed
     print(f" * {from_path} {template_path} -> {dest_path}")
+    finish_page(dest_path, render_page(from_path, template_path, dest_path, hooks_active(), writer))
+
+# Function to record what render_page reported about a page in the main process
+def finish_page(dest_path, result):
+    (links, images), stats = result
+    if link_index is not None:
+        link_index.record(dest_path, links, images)
+    if stats is not None:
+        emit(stats)
+
+# Function to set whether pages generated in this process are minified
+# omit_end_tags only applies to minified pages
+def set_minify(enabled, omit_optional_end_tags=False):
+    global minify_html, omit_end_tags
+    minify_html = enabled
+    omit_end_tags = enabled and omit_optional_end_tags
+
+# Function to enable the site-wide link index for pages generated in this process
+def set_link_index(index):
+    global link_index
+    link_index = index
+    return link_index
+
+# Function to render a markdown file into an HTML page without logging
+# Kept at module level so worker processes can run it
+# Returns ((link URLs, image URLs), stats); with profile=True, stats is a "page" event with
+# timings, node count and bytes read/written, otherwise None
+def render_page(from_path, template_path, dest_path, profile=False, writer=None):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
     # Open and read the markdown file
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+    with open(from_path, "r") as from_file:
+        markdown_content = from_file.read()
 
-    # Open and read the template file
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+    # Load the compiled template, which is only read from disk once per build
+    template = load_template(template_path, minify_html, omit_end_tags)
 
-    # Convert markdown content to an HTML node
-    node = markdown_to_html_node(markdown_content)
-    # Convert the HTML node to HTML string
-    html = node.to_html()
+    # Convert markdown content straight to HTML, reusing cached blocks when enabled
+    # Pages never need the node tree, so the fused path skips building it, minifying as it goes
+    # Links and images point at fingerprinted assets when fingerprinting is enabled
+    buffer = HTMLBuffer(minify_html, omit_end_tags, fingerprint.asset_urls)
+    if block_cache is not None:
+        # Blocks cached with other minify options would come out differently; fingerprinted
+        # URLs are part of the keys of the blocks that use them
+        block_cache.salt = bytes([minify_html, omit_end_tags])
+    markdown_to_buffer(markdown_content, block_cache, buffer)
+    if block_cache is not None:
+        block_cache.flush()
 
     # Extract the title from the markdown content
     title = extract_title(markdown_content)
-    # Replace the placeholders in the template with the title and content
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-
-    # Ensure the destination directory exists
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    # Write the rendered HTML to the destination file
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+
+    # The filled template is streamed straight into the output file, content buffer included,
+    # so the page is never joined into one string or encoded as a whole
+    write_page = functools.partial(template.write, values={"Title": title, "Content": buffer})
+    if writer is not None:
+        writer.submit(dest_path, write_page)
+    else:
+        # Written atomically, and not at all if the existing file is identical
+        dest_dir_path = os.path.dirname(dest_path)
+        if dest_dir_path != "":
+            os.makedirs(dest_dir_path, exist_ok=True)
+        write_stream(dest_path, write_page)
+
+    references = (buffer.links, buffer.images)
+    if not profile:
+        return references, None
+    return references, {
+        "type": "page",
+        "path": str(from_path),
+        "start": start,
+        "wall": time.perf_counter() - start,
+        "cpu": time.process_time() - cpu_start,
+        "pid": os.getpid(),
+        "nodes": buffer.nodes,
+        "bytes_read": len(markdown_content.encode()),
+        "bytes_written": count_bytes(write_page),
+    }
+
+# Class standing in for an output file to count the bytes a page would be written as
+class ByteCounter:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        # Count the encoded size of a chunk
+        self.size += len(text.encode())
+
+# Function to count the bytes a streamed page takes up, without keeping it in memory
+# The page may still be queued in the writer, so it is streamed again into a counter
+def count_bytes(produce):
+    counter = ByteCounter()
+    produce(counter)
+    return counter.size
 
 # Function to extract the title from markdown content
 def extract_title(md):
@@ -1,4 +1,11 @@
+import html
+import re
+
+
 class HTMLNode:
+    # Fixed attribute slots instead of a per-instance __dict__, since pages create many nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         # Initialize the HTMLNode with optional attributes: tag, value, children, and props
         self.tag = tag
@@ -6,18 +13,85 @@ class HTMLNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
-        # Method to convert the node to an HTML string, must be implemented in subclasses
+    def to_html(self, minify=False, omit_end_tags=False):
+        # Convert the node to an HTML string by joining the streamed chunks
+        return "".join(self.iter_html(minify, omit_end_tags))
+
+    def html_parts(self, collapse=False):
+        # Return (opening html, children, closing html), must be implemented in subclasses
+        # With collapse, whitespace runs in text values are rendered as a single space
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self, minify=False, omit_end_tags=False):
+        # Yield the HTML of this node and its descendants as a sequence of string chunks
+        # The tree is walked with an explicit stack, so deep trees don't nest generators
+        if minify:
+            yield from self.iter_minified_html(omit_end_tags)
+            return
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                # A closing tag queued after a parent's children
+                yield item
+                continue
+            opening, children, closing = item.html_parts()
+            yield opening
+            if children:
+                stack.append(closing)
+                stack.extend(reversed(children))
+            elif closing:
+                yield closing
+
+    def iter_minified_html(self, omit_end_tags=False):
+        # Like iter_html, but with whitespace collapsed in text outside pre and code, and with
+        # omit_end_tags, without the end tags an HTML parser infers from what follows
+        # Each stack entry is (node or closing tag, parent tag, next sibling, inside pre or code)
+        stack = [(self, None, None, False)]
+        while stack:
+            item, parent_tag, next_sibling, preformatted = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            inner_preformatted = preformatted or item.tag in preformatted_tags
+            opening, children, closing = item.html_parts(not inner_preformatted)
+            if omit_end_tags and closing and end_tag_omitted(item.tag, next_sibling, parent_tag):
+                closing = ""
+            yield opening
+            if children:
+                stack.append((closing, None, None, preformatted))
+                for i in range(len(children) - 1, -1, -1):
+                    following = children[i + 1] if i + 1 < len(children) else None
+                    stack.append((children[i], item.tag, following, inner_preformatted))
+            elif closing:
+                yield closing
+
+    def write_html(self, stream, buffer_size=65536, minify=False, omit_end_tags=False):
+        # Write the HTML to a file-like object, batching small chunks into larger writes
+        pending = []
+        pending_size = 0
+        for chunk in self.iter_html(minify, omit_end_tags):
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= buffer_size:
+                stream.write("".join(pending))
+                pending = []
+                pending_size = 0
+        if pending:
+            stream.write("".join(pending))
+
     def props_to_html(self):
         # Convert the properties dictionary to a string of HTML attributes
-        if self.props is None:
+        if not self.props:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        items = tuple(self.props.items())
+        try:
+            return props_cache[items]
+        except KeyError:
+            return render_props(items)
+        except TypeError:
+            # An unhashable value can't be a cache key; render it without the cache
+            return format_props(items)
 
     def __repr__(self):
         # Return a string representation of the HTMLNode
@@ -25,17 +99,20 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         # Initialize the LeafNode, calling the parent constructor
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
-        # Convert the LeafNode to an HTML string
+    def html_parts(self, collapse=False):
+        # A LeafNode renders completely in its opening part
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
+        value = collapse_whitespace(self.value) if collapse else self.value
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value, None, ""
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>", None, ""
 
     def __repr__(self):
         # Return a string representation of the LeafNode
@@ -43,21 +120,79 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         # Initialize the ParentNode, calling the parent constructor
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
-        # Convert the ParentNode and its children to an HTML string
+    def html_parts(self, collapse=False):
+        # A ParentNode wraps its children's HTML in opening and closing tags
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
 
     def __repr__(self):
         # Return a string representation of the ParentNode
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+# Rendered attribute strings keyed by their (name, value) pairs
+# Pages repeat the same hrefs and srcs over and over; the cache is emptied when it fills up
+props_cache = {}
+props_cache_size = 4096
+
+
+# Function to render (name, value) pairs as HTML attributes, reusing the cached string if any
+def render_props(items):
+    props_html = props_cache.get(items)
+    if props_html is None:
+        props_html = format_props(items)
+        if len(props_cache) >= props_cache_size:
+            props_cache.clear()
+        props_cache[items] = props_html
+    return props_html
+
+
+# Function to format (name, value) pairs as HTML attributes with escaped values, in one join
+def format_props(items):
+    return "".join([f' {name}="{html.escape(str(value))}"' for name, value in items])
+
+
+# Elements whose text is rendered exactly as written, so minifying leaves it alone
+preformatted_tags = frozenset(["pre", "code", "textarea", "script", "style"])
+
+# Runs of HTML whitespace that render the same as a single space; non-breaking spaces are kept
+whitespace_run_pattern = re.compile(r"[ \t\n\r\f]{2,}|[\t\n\r\f]")
+
+
+# Function to collapse each run of whitespace in text to a single space
+def collapse_whitespace(text):
+    return whitespace_run_pattern.sub(" ", text)
+
+
+# Elements that close an open <p> when they start, so its end tag can be left out before them
+p_closing_tags = frozenset(
+    "address article aside blockquote details div dl fieldset figcaption figure footer form "
+    "h1 h2 h3 h4 h5 h6 header hgroup hr main menu nav ol p pre section table ul".split()
+)
+
+# Parents at whose end a <p> still needs its end tag
+p_end_tag_parents = frozenset(["a", "audio", "del", "ins", "map", "noscript", "video"])
+
+
+# Function to check if the HTML spec lets an element's end tag be omitted, given the node
+# following it (None at the end of its parent) and its parent's tag (None for the root)
+def end_tag_omitted(tag, next_sibling, parent_tag):
+    if parent_tag is None:
+        # Without a parent, there is no "end of parent" to close the element
+        return False
+    if tag == "li":
+        return next_sibling is None or next_sibling.tag == "li"
+    if tag == "p":
+        if next_sibling is None:
+            return parent_tag not in p_end_tag_parents
+        return next_sibling.tag in p_closing_tags
+    return False
@@ -9,8 +9,96 @@ from textnode import (
     text_type_link,
 )
 
+# Patterns for inline images and links, compiled once at import time
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+link_pattern = re.compile(r"(?<!!)\[(.*?)\]\((.*?)\)")
+
+# Matches the inline delimiters; "**" is tried before "*" just like the bold pass ran first
+delimiter_pattern = re.compile(r"\*\*|\*|`")
+
 # Function to convert plain text into a list of TextNode objects with various text types
+# Single linear walk over the delimiters that yields the same nodes as text_to_textnodes_multipass
 def text_to_textnodes(text):
+    nodes = []
+    scan_inline(text, node_emitter(nodes))
+    return nodes
+
+# Function to make an emit callback that appends each span to nodes as a TextNode
+def node_emitter(nodes):
+    def emit(text, text_type, url=None):
+        nodes.append(TextNode(text, text_type, url))
+
+    return emit
+
+# Function to walk the inline markup of text, calling emit(text, text_type, url) for each span
+# in order; text_to_textnodes builds TextNodes from the spans, the fused renderer HTML strings
+def scan_inline(text, emit):
+    # The delimiter of the formatted section currently open, if any, and where its content starts
+    open_delimiter = None
+    start = 0
+    for match in delimiter_pattern.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            # A delimiter ends the plain text run before it and opens a formatted section
+            emit_text(emit, text[start : match.start()])
+            open_delimiter = delimiter
+            start = match.end()
+            continue
+        if delimiter == open_delimiter:
+            # The matching delimiter closes the section; empty sections produce no span
+            if match.start() > start:
+                emit(text[start : match.start()], delimiter_text_types[delimiter])
+            open_delimiter = None
+            start = match.end()
+            continue
+        # Bold content is only ended by "**" and italic content only by "*" or "**", so
+        # other delimiters inside them are literal text
+        if open_delimiter == "**" or (open_delimiter == "*" and delimiter == "`"):
+            continue
+        # Anything else means a section was cut off by a stronger delimiter before closing
+        raise ValueError("Invalid markdown, formatted section not closed")
+    if open_delimiter is not None:
+        raise ValueError("Invalid markdown, formatted section not closed")
+    emit_text(emit, text[start:])
+
+# Text types produced by each inline delimiter
+delimiter_text_types = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+
+# Function to emit a plain text run, splitting out any images and links it contains
+def emit_text(emit, text):
+    if text == "":
+        return
+    # Both images and links need a "[", so most runs skip the regex scans entirely
+    if "[" not in text:
+        emit(text, text_type_text)
+        return
+    # Images are split out first, then links in the text between them, like the original passes
+    pos = 0
+    for match in image_pattern.finditer(text):
+        emit_pattern(emit, text[pos : match.start()], link_pattern, text_type_link)
+        emit(match.group(1), text_type_image, match.group(2))
+        pos = match.end()
+    emit_pattern(emit, text[pos:], link_pattern, text_type_link)
+
+# Function to emit text, turning every match of pattern into a span of text_type
+# Works from match offsets, so the cost is linear in the length of the text
+def emit_pattern(emit, text, pattern, text_type):
+    pos = 0
+    for match in pattern.finditer(text):
+        if match.start() > pos:
+            emit(text[pos : match.start()], text_type_text)
+        emit(match.group(1), text_type, match.group(2))
+        pos = match.end()
+    if pos < len(text):
+        emit(text[pos:], text_type_text)
+
+# Function to convert plain text into TextNodes by running each inline pass over the whole list
+# This is the original pipeline, kept as the reference implementation for text_to_textnodes
+def text_to_textnodes_multipass(text):
     # Start with the entire text as a single text node
     nodes = [TextNode(text, text_type_text)]
     # Split text nodes into bold nodes where "**" delimiter is found
@@ -60,29 +148,8 @@ def split_nodes_image(old_nodes):
         if old_node.text_type != text_type_text:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        # Extract all image syntax from the text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        # Iterate over found images and replace them with image text nodes
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    text_type_image,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
+        # Replace each image match with an image text node, keeping the text around it
+        emit_pattern(node_emitter(new_nodes), old_node.text, image_pattern, text_type_image)
     return new_nodes
 
 # Function to identify and convert link markdown syntax into link text nodes
@@ -93,33 +160,14 @@ def split_nodes_link(old_nodes):
         if old_node.text_type != text_type_text:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        # Extract all link syntax from the text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
-            new_nodes.append(old_node)
-            continue
-        # Iterate over found links and replace them with link text nodes
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(TextNode(link[0], text_type_link, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
+        # Replace each link match with a link text node, keeping the text around it
+        emit_pattern(node_emitter(new_nodes), old_node.text, link_pattern, text_type_link)
     return new_nodes
 
 # Function to extract all image markdown syntax from text
 def extract_markdown_images(text):
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return image_pattern.findall(text)
 
 # Function to extract all link markdown syntax from text
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return link_pattern.findall(text)
@@ -0,0 +1,134 @@
+import json
+import os
+import posixpath
+
+# Bump this whenever the layout of the index file changes
+link_index_version = 1
+
+
+# Function to map a file in the public directory to the URL path it is served at
+def site_url(dest_path, public_dir):
+    return "/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+
+
+# Function to resolve a link on a page to a site URL path, or None for external links
+# Relative links are resolved against the page's directory; queries and fragments are dropped
+def resolve_url(url, page_url):
+    if url.startswith("//") or "://" in url or url.startswith(("mailto:", "tel:", "data:", "#")):
+        return None
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if url == "":
+        return None
+    if not url.startswith("/"):
+        url = posixpath.join(posixpath.dirname(page_url), url)
+    resolved = posixpath.normpath(url)
+    # normpath drops the trailing slash that marks a directory link
+    if url.endswith("/") and resolved != "/":
+        resolved += "/"
+    return resolved
+
+
+# Function to check if a site URL path names an existing output, the way a static host serves it:
+# the file itself, DIR/index.html for a directory, or NAME.html for an extensionless page
+def url_exists(url, outputs):
+    if url.endswith("/"):
+        return url + "index.html" in outputs
+    return url in outputs or url + "/index.html" in outputs or url + ".html" in outputs
+
+
+# Class holding every page's outgoing links and images, saved between builds
+class LinkIndex:
+    def __init__(self, path, public_dir, pages=None):
+        # Path of the index file, and page URL -> (link URLs, image URLs) as written in the markdown
+        self.path = path
+        self.public_dir = public_dir
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path, public_dir):
+        # Load the index saved by a previous build, starting empty if it is missing or outdated
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return cls(path, public_dir)
+        if data.get("version") != link_index_version:
+            return cls(path, public_dir)
+        urls = data["urls"]
+        pages = {}
+        for page_url, (links, images) in data["pages"].items():
+            pages[page_url] = ([urls[i] for i in links], [urls[i] for i in images])
+        return cls(path, public_dir, pages)
+
+    def record(self, dest_path, links, images):
+        # Replace the references of the page written to dest_path
+        self.pages[site_url(dest_path, self.public_dir)] = (list(links), list(images))
+
+    def retain(self, dest_paths):
+        # Drop the pages that are no longer part of the site
+        keep = {site_url(dest_path, self.public_dir) for dest_path in dest_paths}
+        for page_url in list(self.pages):
+            if page_url not in keep:
+                del self.pages[page_url]
+
+    def referencing_pages(self, shared=()):
+        # Return resolved target URL -> sorted pages linking to or embedding it
+        # shared holds URLs every page carries, such as the template's, resolved against each page
+        shared = list(shared)
+        targets = {}
+        for page_url, (links, images) in self.pages.items():
+            for url in links + images + shared:
+                target = resolve_url(url, page_url)
+                if target is not None:
+                    targets.setdefault(target, set()).add(page_url)
+        return {target: sorted(pages) for target, pages in targets.items()}
+
+    def find_broken(self, outputs, shared=()):
+        # Check every internal link and image against the set of output URL paths
+        # shared holds URLs every page carries, such as the template's; each is checked once,
+        # absolute ones for the whole site and relative ones for each directory holding pages
+        # Returns (page URL, "link" or "image", URL as written) for each reference with no target,
+        # then ("*" or the directory URL, "template", URL as written) for each broken shared one
+        broken = []
+        for page_url in sorted(self.pages):
+            links, images = self.pages[page_url]
+            for kind, urls in (("link", links), ("image", images)):
+                for url in urls:
+                    target = resolve_url(url, page_url)
+                    if target is not None and not url_exists(target, outputs):
+                        broken.append((page_url, kind, url))
+        if not self.pages:
+            return broken
+        # The directory URLs relative references resolve against, such as "/" and "/majesty/"
+        directories = sorted({posixpath.join(posixpath.dirname(page_url), "") for page_url in self.pages})
+        for url in shared:
+            scopes = ["*"] if url.startswith("/") else directories
+            for scope in scopes:
+                target = resolve_url(url, "/" if scope == "*" else scope)
+                if target is not None and not url_exists(target, outputs):
+                    broken.append((scope, "template", url))
+        return broken
+
+    def save(self):
+        # Write the index compactly: each distinct URL is stored once and pages refer to it by number
+        urls = []
+        numbers = {}
+
+        def number(url):
+            if url not in numbers:
+                numbers[url] = len(urls)
+                urls.append(url)
+            return numbers[url]
+
+        pages = {}
+        for page_url in sorted(self.pages):
+            links, images = self.pages[page_url]
+            pages[page_url] = [[number(url) for url in links], [number(url) for url in images]]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": link_index_version, "urls": urls, "pages": pages}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def __repr__(self):
+        # Return a string representation with the number of pages indexed
+        return f"LinkIndex({len(self.pages)} pages)"
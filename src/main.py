@@ -1,26 +1,526 @@
+import argparse
 import os
 import shutil
+import sys
 
-from copystatic import copy_files_recursive  # Import function to copy static files
-from gencontent import generate_pages_recursive  # Import function to generate pages from content
+from assetrefs import default_asset_allowlist, referenced_static_files  # Import referenced asset discovery
+from copystatic import (  # Import functions to copy static files
+    sync_static,
+    transfer_methods,
+)
+from depgraph import DependencyGraph  # Import the page dependency graph
+from devserver import SiteWatcher, serve  # Import the watch mode rebuilder and dev server
+from fingerprint import fingerprint_assets, publish_assets, set_asset_urls  # Import asset fingerprinting
+from gencontent import (  # Import functions to generate pages from content
+    PageBuildError,
+    close_block_cache,
+    discover_pages,
+    open_block_cache,
+    set_link_index,
+    set_minify,
+    generate_pages_parallel,
+    generate_pages_recursive,
+)
+from linkindex import LinkIndex, site_url  # Import the site-wide link and image index
+from manifest import BuildManifest  # Import the manifest used for incremental builds
+from precompress import (  # Import output precompression
+    compression_formats,
+    default_min_size,
+    precompress_outputs,
+    remove_precompressed,
+    remove_stale_variants,
+    variant_suffixes,
+)
+from profiler import BuildProfiler, add_build_hook, remove_build_hook, stage  # Import build profiling
+from sharding import parse_shard, shard_dir_name, verify_shards, write_shard_manifest  # Import sharded build support
+from template import load_template  # Import the compiled page template
+from walker import kind_dir, walk_assets  # Import the static file walker
 
 
 dir_path_static = "./static"  # Path to static files directory
 dir_path_public = "./public"  # Path to public output directory
 dir_path_content = "./content"  # Path to content files directory
 template_path = "./template.html"  # Path to HTML template file
+manifest_path = "./.build_manifest.json"  # Path to the incremental build manifest
+block_cache_path = "./.block_cache.sqlite"  # Path to the persistent block render cache
+link_index_path = "./.link_index.json"  # Path to the index of every page's links and images
+fingerprint_cache_path = "./.fingerprint_cache.json"  # Path to the cached content hashes of static files
+precompress_cache_path = "./.precompress_cache.json"  # Path to the hashes of the outputs last precompressed
 
 
-def main():
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):  # Check if the public directory exists
-        shutil.rmtree(dir_path_public)  # Remove the public directory and its contents
+# Function to parse the command line options
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site into the public directory")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and copy static files whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="render pages in a pool of worker processes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes for --parallel (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=4,
+        help="number of threads writing rendered pages in a sequential build (default: 4)",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=transfer_methods,
+        default="copy",
+        help="how --incremental places changed static files in public (default: copy)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --incremental, compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=None,
+        help="number of threads used to sync static files with --incremental",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML for markdown blocks seen in previous builds",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=64,
+        help="maximum size of the block cache in MB (default: 64)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, serve the public directory and rebuild pages and assets as they change",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port for the --watch dev server (default: 8888)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print wall/CPU time per stage and the slowest pages after the build",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="write the profile as a JSON trace to this path (implies --profile)",
+    )
+    parser.add_argument(
+        "--chrome-trace",
+        action="store_true",
+        help="write --profile-output in Chrome trace format instead of the plain JSON trace",
+    )
+    parser.add_argument(
+        "--referenced-assets",
+        action="store_true",
+        help="copy only the static files pages link to or embed, plus the allowlist and what its "
+        "stylesheets reference; everything else is left out of (or pruned from) public",
+    )
+    parser.add_argument(
+        "--asset-allowlist",
+        action="append",
+        metavar="PATTERN",
+        help="with --referenced-assets, a glob relative to the static directory to always copy "
+        f"(repeatable, default: {', '.join(default_asset_allowlist)})",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish static files as NAME.HASH.EXT, point pages, the template and stylesheets at them "
+        "and write public/asset-manifest.json, so assets can be cached forever",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace in pages and the template, outside pre, code, script and style",
+    )
+    parser.add_argument(
+        "--omit-optional-tags",
+        action="store_true",
+        help="with --minify, also leave out the </p> and </li> end tags HTML parsers infer",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="after building, write compressed variants (index.html.gz, ...) of the HTML, CSS and "
+        "other text outputs for servers that serve precompressed files",
+    )
+    parser.add_argument(
+        "--precompress-format",
+        action="append",
+        choices=sorted(compression_formats),
+        help="with --precompress, a compressed variant to write (repeatable, default: gz)",
+    )
+    parser.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=default_min_size,
+        help=f"with --precompress, leave outputs smaller than this many bytes uncompressed (default: {default_min_size})",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="after building, report internal links and images that point to no page or static file",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="build only shard I of N (numbered from 1) into public without deleting it; "
+        "shard 1 also copies the static files",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="check that the merged output of all shards has every page and asset exactly once, then exit",
+    )
+    parser.add_argument(
+        "--affected-by",
+        action="append",
+        metavar="PATH",
+        help="print the pages the last --incremental build says must rebuild if PATH changes, then exit",
+    )
+    args = parser.parse_args(argv)
+    if args.referenced_assets and args.shard is not None:
+        # A shard only sees the references of its own pages
+        parser.error("--referenced-assets can't be combined with --shard")
+    if args.fingerprint and args.shard is not None:
+        # Shard manifests list static files under their original names
+        parser.error("--fingerprint can't be combined with --shard")
+    if args.fingerprint and args.watch:
+        # The dev server republishes changed assets under their original names
+        parser.error("--fingerprint can't be combined with --watch")
+    if args.omit_optional_tags and not args.minify:
+        parser.error("--omit-optional-tags requires --minify")
+    if args.asset_allowlist is None:
+        args.asset_allowlist = list(default_asset_allowlist)
+    if args.precompress_format is None:
+        args.precompress_format = ["gz"]
+    return args
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)  # Copy static files to the public directory
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.affected_by:
+        print_affected(args.affected_by)
+        return
+    if args.merge_shards:
+        merge_shards()
+        return
+    set_minify(args.minify, args.omit_optional_tags)
+    if args.block_cache:
+        open_block_cache(block_cache_path, args.block_cache_size * 1024 * 1024)
+    # Incremental builds only re-render changed pages, so they extend the previous index
+    if args.incremental:
+        link_index = set_link_index(LinkIndex.load(shard_path(link_index_path, args), dir_path_public))
+    else:
+        link_index = set_link_index(LinkIndex(shard_path(link_index_path, args), dir_path_public))
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = BuildProfiler()
+        add_build_hook(profiler)
+    try:
+        try:
+            with stage("build"):
+                try:
+                    fingerprints = fingerprint_static(args)
+                    if args.incremental:
+                        build_incremental(args, link_index, fingerprints)
+                    else:
+                        build_full(args, link_index, fingerprints)
+                finally:
+                    save_link_index(args, link_index)
+                    if args.shard is not None:
+                        # Written even after failures so the merge step can name what's missing
+                        write_shard_manifest(dir_path_public, args.shard, shard_outputs(args.shard))
+        except PageBuildError as e:
+            # Report every failed page at once instead of a traceback for the first one
+            print(e)
+            if not args.watch:
+                sys.exit(1)
+        finally:
+            if profiler is not None:
+                remove_build_hook(profiler)
+                report_profile(args, profiler)
+        if args.check_links and check_links(link_index) and not args.watch:
+            sys.exit(1)
+        if args.watch:
+            watch(args)
+    finally:
+        close_block_cache()
+
+
+# Function to print the profile report and write the trace file if requested
+def report_profile(args, profiler):
+    print(profiler.report())
+    if args.profile_output:
+        profiler.write(args.profile_output, chrome=args.chrome_trace)
+        print(f"Wrote profile trace to {args.profile_output}")
+
+
+# Function to print the pages depending on any of the given files, per the saved manifest
+def print_affected(paths):
+    graph = DependencyGraph.from_manifest(BuildManifest.load(manifest_path), dir_path_static)
+    for page in graph.affected_by(*paths):
+        print(page)
+
+
+# Function to list the pages and static files in the public directory a shard is responsible for
+def shard_outputs(shard):
+    outputs = [dest_path for _, dest_path in discover_pages(dir_path_content, dir_path_public, shard)]
+    if shard is None or shard[0] == 1:
+        outputs.extend(item.dest for item in walk_assets(dir_path_static, dir_path_public) if item.kind != kind_dir)
+    return outputs
+
+
+# Function to verify the merged output of a sharded build and drop the shard manifests
+def merge_shards():
+    problems = verify_shards(dir_path_public, shard_outputs(None))
+    for problem in problems:
+        print(f" ! {problem}")
+    if problems:
+        print(f"Shard merge failed with {len(problems)} problem(s)")
+        sys.exit(1)
+    shutil.rmtree(os.path.join(dir_path_public, shard_dir_name))
+    print("Shard merge verified: every output was built exactly once")
+
+
+# Function to return the manifest path for the build, one per shard so shards don't share one
+def build_manifest_path(args):
+    return shard_path(manifest_path, args)
+
+
+# Function to give a per-build state file a separate name for each shard
+def shard_path(path, args):
+    if args.shard is None:
+        return path
+    index, count = args.shard
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard-{index}-of-{count}{extension}"
+
+
+# Function to find the static files the generated pages reference, plus the allowlisted ones
+def referenced_assets(args, link_index):
+    pages = discover_pages(dir_path_content, dir_path_public)
+    # Deleted pages no longer keep their assets alive
+    link_index.retain(dest_path for _, dest_path in pages)
+    targets = link_index.referencing_pages(template_references())
+    only = referenced_static_files(dir_path_static, targets, args.asset_allowlist)
+    print(f" * {len(only)} static files referenced")
+    return only
+
+
+# Function to list the src and href URLs of the page template, which every page carries
+# (stylesheets, scripts, favicons); they're read before fingerprinting rewrites them
+def template_references():
+    return load_template(template_path).references
+
+
+# Function to drop deleted pages from the link index and save it
+def save_link_index(args, link_index):
+    pages = discover_pages(dir_path_content, dir_path_public, args.shard)
+    link_index.retain(dest_path for _, dest_path in pages)
+    link_index.save()
+
+
+# Function to report links and images in the index that don't resolve to any output
+# Returns the broken references as (page URL, "link" or "image", URL), then the template's
+# as ("*" for every page or a directory URL, "template", URL)
+def check_links(link_index):
+    outputs = {site_url(dest_path, dir_path_public) for dest_path in shard_outputs(None)}
+    broken = link_index.find_broken(outputs, template_references())
+    for page_url, kind, url in broken:
+        print(f" ! {page_url}: broken {kind} {url}")
+    print(f"Checked links: {len(broken)} broken")
+    return broken
+
+
+# Function to hash the static files and render pages with their fingerprinted URLs, if enabled
+# Returns the AssetFingerprints to publish, or None when assets keep their names
+def fingerprint_static(args):
+    if not args.fingerprint:
+        return None
+    print("Fingerprinting static files...")
+    with stage("fingerprint assets"):
+        fingerprints = fingerprint_assets(dir_path_static, fingerprint_cache_path, args.copy_workers)
+    set_asset_urls(fingerprints.urls())
+    return fingerprints
+
+
+# Function to serve the site and rebuild only the touched pages and assets until interrupted
+def watch(args):
+    watcher = SiteWatcher(dir_path_content, dir_path_static, template_path, dir_path_public)
+    server = serve(dir_path_public, args.port)
+    print("Watching for changes, press Ctrl+C to stop...")
+    try:
+        watcher.watch()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+# Function to generate pages sequentially or in parallel depending on the options
+def generate_content(args, manifest=None):
+    if args.parallel:
+        generate_pages_parallel(dir_path_content, template_path, dir_path_public, args.workers, manifest, args.shard)
+    else:
+        generate_pages_recursive(
+            dir_path_content, template_path, dir_path_public, manifest, args.write_workers, args.shard
+        )
+
+
+# Function to rebuild the whole site from scratch
+# A shard leaves the public directory in place since other shards may be writing to it
+# With --referenced-assets, static files are copied after the pages so their references are known
+# With fingerprints, static files are published under their fingerprinted names instead
+# Every output is recorded in a new manifest, so a following --incremental build starts from it
+def build_full(args, link_index, fingerprints=None):
+    if args.shard is None:
+        print("Deleting public directory...")
+    with stage("delete public"):
+        if os.path.exists(dir_path_public) and args.shard is None:  # Check if the public directory exists
+            shutil.rmtree(dir_path_public)  # Remove the public directory and its contents
+        if os.path.exists(build_manifest_path(args)):  # A full build invalidates any previous manifest
+            os.remove(build_manifest_path(args))
+    manifest = BuildManifest(build_manifest_path(args))
+
+    if (args.shard is None or args.shard[0] == 1) and not args.referenced_assets:
+        print("Copying static files to public directory...")
+        with stage("copy static"):
+            copy_static_files(args, manifest, fingerprints)  # Copy static files to the public directory
 
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public)  # Generate HTML pages from content
+    error = None
+    try:
+        with stage("generate pages"):
+            # Nothing is fresh in an empty manifest, so every page is rendered and recorded
+            generate_content(args, manifest)  # Generate HTML pages from content
+    except PageBuildError as e:
+        # The pages that did build still need their assets
+        error = e
+
+    if args.referenced_assets:
+        print("Copying referenced static files to public directory...")
+        with stage("copy static"):
+            copy_static_files(args, manifest, fingerprints, referenced_assets(args, link_index))
+    with stage("save manifest"):
+        manifest.save()
+    precompress(args)
+    if error is not None:
+        raise error
+
+
+# Function to rebuild only what changed, using the manifest from the previous build
+# With --referenced-assets, static files are synced after the pages and unreferenced ones pruned
+def build_incremental(args, link_index, fingerprints=None):
+    with stage("load manifest"):
+        manifest = BuildManifest.load(build_manifest_path(args))
+    # Without an existing public directory every recorded output is gone anyway
+    os.makedirs(dir_path_public, exist_ok=True)
+
+    if (args.shard is None or args.shard[0] == 1) and not args.referenced_assets:
+        print("Syncing static files to public directory...")
+        with stage("sync static"):
+            sync_static_files(args, manifest, fingerprints=fingerprints)
+
+    print("Generating changed content...")
+    error = None
+    try:
+        with stage("generate pages"):
+            generate_content(args, manifest)
+    except PageBuildError as e:
+        # Every page was visited, so the manifest is still complete enough to save
+        error = e
+
+    if args.referenced_assets:
+        print("Syncing referenced static files to public directory...")
+        with stage("sync static"):
+            sync_static_files(args, manifest, referenced_assets(args, link_index), fingerprints)
+
+    print("Removing stale outputs...")
+    with stage("remove stale outputs"):
+        for dest_path in manifest.remove_stale(dir_path_public, variant_suffixes):
+            print(f" * removed {dest_path}")
+        manifest.save()
+    precompress(args)
+    if error is not None:
+        raise error
+
+
+# Function to write compressed variants of the outputs, if enabled
+# A shard only checks and compresses its own outputs since other shards may be writing theirs
+def precompress(args):
+    paths = shard_outputs(args.shard) if args.shard is not None else None
+    # Variants of deleted or rewritten outputs no longer match them, whichever build wrote them
+    remove_stale_variants(dir_path_public, paths)
+    if not args.precompress:
+        # Variants an earlier build wrote would stop being refreshed
+        remove_precompressed(dir_path_public, shard_path(precompress_cache_path, args))
+        return
+    print("Precompressing outputs...")
+    with stage("precompress"):
+        precompress_outputs(
+            dir_path_public,
+            shard_path(precompress_cache_path, args),
+            args.precompress_format,
+            args.precompress_min_size,
+            paths=paths,
+        )
+
+
+# Function to copy the static directory, or only the given files of it, into public, recording
+# each file in the manifest
+def copy_static_files(args, manifest, fingerprints=None, only=None):
+    if fingerprints is not None:
+        publish_assets(dir_path_static, dir_path_public, fingerprints, manifest, only)
+        return
+    # Syncing against an empty manifest copies every file and records it; full builds always
+    # copy, whatever --link-mode says
+    sync_static(
+        dir_path_static,
+        dir_path_public,
+        manifest,
+        checksum=args.checksum,
+        workers=args.copy_workers,
+        only=only,
+    )
+
+
+# Function to sync the static directory, or only the given files of it, into public
+# Fingerprinted files never change, so they are published once and pruned by the manifest
+def sync_static_files(args, manifest, only=None, fingerprints=None):
+    if fingerprints is not None:
+        publish_assets(dir_path_static, dir_path_public, fingerprints, manifest, only)
+        return
+    sync_static(
+        dir_path_static,
+        dir_path_public,
+        manifest,
+        method=args.link_mode,
+        checksum=args.checksum,
+        workers=args.copy_workers,
+        only=only,
+    )
 
 
-main()  # Call the main function to execute the script
+if __name__ == "__main__":
+    main()  # Call the main function to execute the script
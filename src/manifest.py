@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+
+# Bump this whenever the layout of the manifest entries changes
+manifest_version = 2
+
+
+# Function to compute the SHA-256 hex digest of a file's contents
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        # Read in fixed-size chunks so large static assets don't need to fit in memory
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Class recording what each output in the public directory was built from
+class BuildManifest:
+    def __init__(self, path, entries=None):
+        # Path of the manifest file and the entries loaded from the previous build
+        self.path = path
+        self.entries = entries if entries is not None else {"pages": {}, "static": {}}
+        # Outputs produced (or confirmed fresh) during the current build
+        self.seen = set()
+        # Per-build cache of file hashes, so a shared input like the template is hashed once
+        self.hash_cache = {}
+
+    @classmethod
+    def load(cls, path):
+        # Load the manifest from disk, starting fresh if it is missing, corrupt or outdated
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except ValueError:
+            return cls(path)
+        if data.get("version") != manifest_version:
+            return cls(path)
+        return cls(path, {"pages": data["pages"], "static": data["static"]})
+
+    def file_hash(self, path):
+        # Return the content hash of a file, hashing each path at most once per build
+        path = str(path)
+        if path not in self.hash_cache:
+            self.hash_cache[path] = hash_file(path)
+        return self.hash_cache[path]
+
+    def is_fresh(self, section, dest_path, entry):
+        # An output is fresh when it was built from identical inputs and still exists
+        dest_path = str(dest_path)
+        return self.entries[section].get(dest_path) == entry and os.path.exists(dest_path)
+
+    def record(self, section, dest_path, entry):
+        # Remember the inputs an output was built from and mark it as part of this build
+        dest_path = str(dest_path)
+        self.entries[section][dest_path] = entry
+        self.seen.add(dest_path)
+
+    def retain(self, section, dest_path):
+        # Keep an output and its previous entry without claiming it was rebuilt
+        self.seen.add(str(dest_path))
+
+    def invalidate(self, section, dest_path):
+        # Forget the inputs of an output whose write failed, keeping the output itself
+        dest_path = str(dest_path)
+        self.entries[section].pop(dest_path, None)
+        self.seen.add(dest_path)
+
+    def remove_stale(self, root_dir, companion_suffixes=()):
+        # Delete outputs from previous builds whose sources no longer exist
+        # Files derived from an output, named after it plus one of companion_suffixes (such as
+        # its compressed variants), go with it, so directories holding only those are pruned too
+        removed = []
+        for section in self.entries.values():
+            for dest_path in list(section):
+                if dest_path in self.seen:
+                    continue
+                del section[dest_path]
+                deleted = False
+                for path in [dest_path] + [dest_path + suffix for suffix in companion_suffixes]:
+                    if os.path.exists(path):
+                        os.remove(path)
+                        deleted = True
+                if deleted:
+                    prune_empty_dirs(os.path.dirname(dest_path), root_dir)
+                removed.append(dest_path)
+        return removed
+
+    def save(self):
+        # Write the manifest atomically so an interrupted build never leaves it half-written
+        data = {"version": manifest_version}
+        data.update(self.entries)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# Function to remove empty directories from dir_path up to, but not including, root_dir
+def prune_empty_dirs(dir_path, root_dir):
+    root_dir = os.path.abspath(root_dir)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != root_dir and dir_path.startswith(root_dir + os.sep):
+        if os.listdir(dir_path):
+            return
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
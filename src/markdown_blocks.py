@@ -1,6 +1,8 @@
-from htmlnode import ParentNode
-from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node
+import re
+
+from htmlnode import LeafNode, ParentNode, collapse_whitespace
+from inline_markdown import scan_inline, text_to_textnodes
+from textnode import text_node_to_html_node, text_span_to_html, text_type_code, text_type_image, text_type_link
 
 # Define block types for different markdown elements
 block_type_paragraph = "paragraph"
@@ -10,30 +12,168 @@ block_type_quote = "quote"
 block_type_olist = "ordered_list"
 block_type_ulist = "unordered_list"
 
+# Version of the block renderer output; bump it whenever the HTML produced for a block changes
+# so persistent block caches drop entries rendered by older code
+renderer_version = 2
+
+# Class describing one block found by scan_blocks, as offsets into the markdown source
+# The text, lines and type are each computed once, on first use, and shared by the
+# classifier and the renderers
+class Block:
+    __slots__ = ("source", "start", "end", "cached_text", "cached_lines", "cached_type")
+
+    def __init__(self, source, start, end):
+        # The block spans source[start:end], already stripped of surrounding whitespace
+        self.source = source
+        self.start = start
+        self.end = end
+        self.cached_text = None
+        self.cached_lines = None
+        self.cached_type = None
+
+    def text(self):
+        # The block's text, as markdown_to_blocks returns it
+        if self.cached_text is None:
+            self.cached_text = self.source[self.start : self.end]
+        return self.cached_text
+
+    def lines(self):
+        # The block's lines, without their newlines
+        if self.cached_lines is None:
+            self.cached_lines = self.text().split("\n")
+        return self.cached_lines
+
+    @property
+    def block_type(self):
+        # The block's type, classified from its text so headings and code never split lines
+        if self.cached_type is None:
+            self.cached_type = text_to_block_type(self.text())
+        return self.cached_type
+
+    def __repr__(self):
+        # Return a string representation of the Block
+        return f"Block({self.block_type}, {self.start}, {self.end})"
+
+# Function to wrap an already separated block of text in a Block record
+def text_to_block(text):
+    return Block(text, 0, len(text))
+
+# Matches the blank lines between two blocks, including lines holding only spaces or tabs
+# The separator is captured, so splits keep it; it strips to nothing and is dropped with the
+# empty chunks, while still counting towards the offsets of the blocks after it
+block_separator_pattern = re.compile(r"(\n(?:[^\S\n]*\n)+)")
+
+# Function to find the blocks of a markdown document in a single scan
+# Blocks are separated by blank lines, including ones holding only whitespace, as in
+# markdown_to_blocks; returns Block records pointing into the document, with their stripped
+# text already set
+def scan_blocks(markdown):
+    blocks = []
+    offset = 0
+    for chunk in block_separator_pattern.split(markdown):
+        text = chunk.strip()
+        if text:
+            # Leading whitespace never equals the first character left after stripping
+            start = offset + chunk.find(text[0])
+            block = Block(markdown, start, start + len(text))
+            block.cached_text = text
+            blocks.append(block)
+        offset += len(chunk)
+    return blocks
+
 # Function to convert markdown into blocks
 def markdown_to_blocks(markdown):
-    # Split the markdown content into blocks separated by double newlines
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
-            continue
-        block = block.strip()  # Remove leading and trailing whitespace
-        filtered_blocks.append(block)
-    return filtered_blocks
+    # Split on blank lines, even ones holding whitespace, and strip each block
+    return [text for text in [chunk.strip() for chunk in block_separator_pattern.split(markdown)] if text]
 
 # Function to determine the type of a markdown block
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return text_to_block_type(block)
+
+# Matches the marker of a heading: one to six "#" followed by a space
+heading_pattern = re.compile(r"#{1,6} ")
+
+# Ordered list markers "1. ", "2. ", ... built once instead of formatting one per line
+olist_markers = [f"{i}. " for i in range(1, 101)]
+
+# Function to classify a block starting with "#"
+def classify_heading(text):
+    if heading_pattern.match(text):
+        return block_type_heading
+    return block_type_paragraph
+
+# Function to classify a block starting with "`"
+def classify_code(text):
+    # A code block has at least two lines, the first and last opening with ```
+    last_line = text.rfind("\n") + 1
+    if last_line > 0 and text.startswith("```") and text.startswith("```", last_line):
+        return block_type_code
+    return block_type_paragraph
+
+# Function to classify a block starting with ">"
+def classify_quote(text):
+    # Every line starts with ">" exactly when every newline is followed by one
+    if text.count("\n") == text.count("\n>"):
+        return block_type_quote
+    return block_type_paragraph
+
+# Function to classify a block starting with "*" or "-"
+def classify_ulist(text):
+    marker = text[:2]
+    if marker != "* " and marker != "- ":
+        return block_type_paragraph
+    # Every line starts with the first line's marker exactly when every newline is followed by it
+    if text.count("\n") == text.count("\n" + marker):
+        return block_type_ulist
+    return block_type_paragraph
+
+# Function to classify a block starting with "1"
+def classify_olist(text):
+    # Walk the lines by offset, checking each is numbered one more than the last
+    number = 1
+    start = 0
+    while True:
+        marker = olist_markers[number - 1] if number <= len(olist_markers) else f"{number}. "
+        if not text.startswith(marker, start):
+            return block_type_paragraph
+        start = text.find("\n", start) + 1
+        if start == 0:
+            return block_type_olist
+        number += 1
+
+# Classifier for each character a non-paragraph block can start with
+block_classifiers = {
+    "#": classify_heading,
+    "`": classify_code,
+    ">": classify_quote,
+    "*": classify_ulist,
+    "-": classify_ulist,
+    "1": classify_olist,
+}
+
+# Function to determine the type of a markdown block from its text
+# Dispatches on the first character, so most paragraphs are classified by one dict lookup
+def text_to_block_type(text):
+    if not text:
+        return block_type_paragraph
+    classifier = block_classifiers.get(text[0])
+    if classifier is None:
+        return block_type_paragraph
+    return classifier(text)
+
+# Function to determine the type of a markdown block from its lines with a chain of checks
+# Kept as the reference implementation the table-driven classifier is tested against
+def lines_to_block_type(lines):
+    first_line = lines[0]
 
     # Check if the block is a heading
     if (
-        block.startswith("# ")
-        or block.startswith("## ")
-        or block.startswith("### ")
-        or block.startswith("#### ")
-        or block.startswith("##### ")
-        or block.startswith("###### ")
+        first_line.startswith("# ")
+        or first_line.startswith("## ")
+        or first_line.startswith("### ")
+        or first_line.startswith("#### ")
+        or first_line.startswith("##### ")
+        or first_line.startswith("###### ")
     ):
         return block_type_heading
     
@@ -42,26 +182,26 @@ def block_to_block_type(block):
         return block_type_code
     
     # Check if the block is a quote block
-    if block.startswith(">"):
+    if first_line.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return block_type_paragraph
         return block_type_quote
     
     # Check if the block is an unordered list (bulleted list)
-    if block.startswith("* "):
+    if first_line.startswith("* "):
         for line in lines:
             if not line.startswith("* "):
                 return block_type_paragraph
         return block_type_ulist
-    if block.startswith("- "):
+    if first_line.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return block_type_paragraph
         return block_type_ulist
     
     # Check if the block is an ordered list (numbered list)
-    if block.startswith("1. "):
+    if first_line.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -73,17 +213,28 @@ def block_to_block_type(block):
     return block_type_paragraph
 
 # Function to convert markdown to HTML node structure
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+# With a BlockCache, blocks rendered before are reused as raw HTML instead of being re-parsed;
+# the minifying serializer treats those leaves as text, so such trees are serialized plainly
+def markdown_to_html_node(markdown, cache=None):
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    for block in scan_blocks(markdown):
+        if cache is None:
+            children.append(block_to_html_node(block))
+            continue
+        text = block.text()
+        html = cache.get(text)
+        if html is None:
+            html = block_to_html_node(block).to_html()
+            cache.put(text, html)
+        children.append(LeafNode(None, html))
     return ParentNode("div", children, None)
 
 # Function to convert a block to an HTML node based on its type
+# Accepts a Block record from scan_blocks or the text of a single block
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    if isinstance(block, str):
+        block = text_to_block(block)
+    block_type = block.block_type
     if block_type == block_type_paragraph:
         return paragraph_to_html_node(block)
     if block_type == block_type_heading:
@@ -109,39 +260,37 @@ def text_to_children(text):
 
 # Function to convert a paragraph block to an HTML node
 def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
+    paragraph = " ".join(block.lines())
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 # Function to convert a heading block to an HTML node
 def heading_to_html_node(block):
+    text = block.text()
     level = 0
-    for char in block:
+    for char in text:
         if char == "#":
             level += 1
         else:
             break
-    if level + 1 >= len(block):
+    if level + 1 >= len(text):
         raise ValueError(f"Invalid heading level: {level}")
-    text = block[level + 1 :]
-    children = text_to_children(text)
+    children = text_to_children(text[level + 1 :])
     return ParentNode(f"h{level}", children)
 
 # Function to convert a code block to an HTML node
 def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
+    text = block.text()
+    if not text.startswith("```") or not text.endswith("```"):
         raise ValueError("Invalid code block")
-    text = block[4:-3]
-    children = text_to_children(text)
+    children = text_to_children(text[4:-3])
     code = ParentNode("code", children)
     return ParentNode("pre", [code])
 
 # Function to convert an ordered list block to an HTML node
 def olist_to_html_node(block):
-    items = block.split("\n")
     html_items = []
-    for item in items:
+    for item in block.lines():
         text = item[3:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
@@ -149,9 +298,8 @@ def olist_to_html_node(block):
 
 # Function to convert an unordered list block to an HTML node
 def ulist_to_html_node(block):
-    items = block.split("\n")
     html_items = []
-    for item in items:
+    for item in block.lines():
         text = item[2:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
@@ -159,12 +307,187 @@ def ulist_to_html_node(block):
 
 # Function to convert a quote block to an HTML node
 def quote_to_html_node(block):
-    lines = block.split("\n")
     new_lines = []
-    for line in lines:
+    for line in block.lines():
         if not line.startswith(">"):
             raise ValueError("Invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+# Matches the text after every "](" up to the next ")", overlapping, so it finds every URL a link
+# or image in a block could have, and a few more
+link_target_pattern = re.compile(r"(?=\]\((.*?)\))")
+
+# Function to build the block cache key of a block rendered with the given asset URLs
+# Only the fingerprinted URLs of assets the block may reference are added to its text, so a
+# changed asset invalidates the blocks using it and leaves every other block cached
+def block_cache_key(text, asset_urls):
+    if not asset_urls or "](" not in text:
+        return text
+    fingerprinted = [asset_urls[url] for url in link_target_pattern.findall(text) if url in asset_urls]
+    if not fingerprinted:
+        return text
+    return text + "\0" + "\0".join(fingerprinted)
+
+# Class collecting the HTML strings produced by the fused render path
+# nodes counts the HTMLNodes markdown_to_html_node would have built for the same output, and
+# links and images collect the URLs of the links and images rendered, in order
+# With minify, the output matches to_html(minify=True, omit_end_tags=omit_end_tags) of that tree
+# asset_urls maps original asset URLs to the fingerprinted ones links and images point at
+class HTMLBuffer:
+    __slots__ = ("parts", "nodes", "links", "images", "minify", "omit_end_tags", "asset_urls", "preformatted")
+
+    def __init__(self, minify=False, omit_end_tags=False, asset_urls=None):
+        self.parts = []
+        self.nodes = 0
+        self.links = []
+        self.images = []
+        self.minify = minify
+        self.omit_end_tags = minify and omit_end_tags
+        self.asset_urls = asset_urls
+        # Set while rendering a code block, whose whitespace is kept as written
+        self.preformatted = False
+
+    def emit(self, text, text_type, url=None):
+        # scan_inline callback: render one inline span
+        # Code spans and image alt text keep their whitespace, as in the minified node tree
+        if self.minify and not self.preformatted and text_type != text_type_code and text_type != text_type_image:
+            text = collapse_whitespace(text)
+        self.parts.append(text_span_to_html(text, text_type, url, self.asset_urls))
+        self.nodes += 1
+        if url is not None:
+            if text_type == text_type_link:
+                self.links.append(url)
+            elif text_type == text_type_image:
+                self.images.append(url)
+
+    def add_references(self, other):
+        # Take over the links and images collected by another buffer
+        self.links.extend(other.links)
+        self.images.extend(other.images)
+
+    def inline(self, text):
+        # Render the inline markup of text
+        scan_inline(text, self.emit)
+
+    def element(self, tag, text):
+        # Render <tag>inline markup of text</tag>
+        self.parts.append(f"<{tag}>")
+        scan_inline(text, self.emit)
+        # Paragraphs are followed by another block or the end of the page's div, and list items
+        # by another item or the end of their list, so a parser infers both end tags
+        if not (self.omit_end_tags and (tag == "p" or tag == "li")):
+            self.parts.append(f"</{tag}>")
+        self.nodes += 1
+
+    def getvalue(self):
+        # Return everything rendered so far as one string
+        return "".join(self.parts)
+
+    def write_html(self, stream, buffer_size=65536, minify=False, omit_end_tags=False):
+        # Write everything rendered so far to a file-like object, batching parts into larger writes
+        # The parts were minified while rendering, so the options a template passes are ignored
+        start = 0
+        pending_size = 0
+        for i, part in enumerate(self.parts):
+            pending_size += len(part)
+            if pending_size >= buffer_size:
+                stream.write("".join(self.parts[start : i + 1]))
+                start = i + 1
+                pending_size = 0
+        if start < len(self.parts):
+            stream.write("".join(self.parts[start:]))
+
+# Function to convert markdown straight to an HTML string, without building node trees
+# Produces exactly markdown_to_html_node(markdown, cache).to_html(); pass an HTMLBuffer
+# to read back the node count, or one made with minify=True for the minified output
+def markdown_to_html(markdown, cache=None, buffer=None):
+    return markdown_to_buffer(markdown, cache, buffer).getvalue()
+
+# Function to render markdown into an HTMLBuffer without joining the parts, for streaming them
+# Returns the buffer, a new one if none is given
+def markdown_to_buffer(markdown, cache=None, buffer=None):
+    if buffer is None:
+        buffer = HTMLBuffer()
+    buffer.parts.append("<div>")
+    buffer.nodes += 1
+    for block in scan_blocks(markdown):
+        if cache is None:
+            block_to_html(block, buffer)
+            continue
+        key = block_cache_key(block.text(), buffer.asset_urls)
+        entry = cache.lookup(key)
+        if entry is None or entry[1] is None:
+            # Blocks cached by markdown_to_html_node have no recorded links, so they're redone too
+            block_buffer = HTMLBuffer(buffer.minify, buffer.omit_end_tags, buffer.asset_urls)
+            block_to_html(block, block_buffer)
+            html = block_buffer.getvalue()
+            cache.put(key, html, (block_buffer.links, block_buffer.images))
+            buffer.add_references(block_buffer)
+        else:
+            # The links and images are stored next to the HTML, so hits never render the block
+            html, links, images = entry
+            buffer.links.extend(links)
+            buffer.images.extend(images)
+        # A cached block stands in for a single raw HTML leaf, as in markdown_to_html_node
+        buffer.parts.append(html)
+        buffer.nodes += 1
+    buffer.parts.append("</div>")
+    return buffer
+
+# Function to render a block into the buffer based on its type
+def block_to_html(block, buffer):
+    block_type = block.block_type
+    if block_type == block_type_paragraph:
+        return buffer.element("p", " ".join(block.lines()))
+    if block_type == block_type_heading:
+        return heading_to_html(block, buffer)
+    if block_type == block_type_code:
+        return code_to_html(block, buffer)
+    if block_type == block_type_olist:
+        return list_to_html(block, buffer, "ol", 3)
+    if block_type == block_type_ulist:
+        return list_to_html(block, buffer, "ul", 2)
+    if block_type == block_type_quote:
+        return quote_to_html(block, buffer)
+    raise ValueError("Invalid block type")
+
+# Function to render a heading block into the buffer
+def heading_to_html(block, buffer):
+    text = block.text()
+    level = len(text) - len(text.lstrip("#"))
+    if level + 1 >= len(text):
+        raise ValueError(f"Invalid heading level: {level}")
+    buffer.element(f"h{level}", text[level + 1 :])
+
+# Function to render a code block into the buffer
+def code_to_html(block, buffer):
+    text = block.text()
+    if not text.startswith("```") or not text.endswith("```"):
+        raise ValueError("Invalid code block")
+    buffer.parts.append("<pre>")
+    buffer.preformatted = True
+    buffer.element("code", text[4:-3])
+    buffer.preformatted = False
+    buffer.parts.append("</pre>")
+    buffer.nodes += 1
+
+# Function to render an ordered or unordered list block into the buffer
+# marker_length is the length of the "1. " or "* " prefix stripped from each item
+def list_to_html(block, buffer, tag, marker_length):
+    buffer.parts.append(f"<{tag}>")
+    for item in block.lines():
+        buffer.element("li", item[marker_length:])
+    buffer.parts.append(f"</{tag}>")
+    buffer.nodes += 1
+
+# Function to render a quote block into the buffer
+def quote_to_html(block, buffer):
+    new_lines = []
+    for line in block.lines():
+        if not line.startswith(">"):
+            raise ValueError("Invalid quote block")
+        new_lines.append(line.lstrip(">").strip())
+    buffer.element("blockquote", " ".join(new_lines))
@@ -0,0 +1,177 @@
+import os
+import queue
+import threading
+
+
+# Function to write bytes to a file atomically, skipping the write if the file already holds them
+# Returns True if the file was written, False if it was already identical
+def write_output(dest_path, data):
+    if is_identical(dest_path, data):
+        # Leave the file and its mtime alone so downstream syncs see nothing changed
+        return False
+    # The temporary file lives next to the destination so os.replace never crosses filesystems
+    tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+# Function to stream text into a file atomically, skipping the write if the file already holds it
+# produce(stream) writes the text in chunks, which are encoded and compared with the existing file
+# as they arrive, so the output never sits in memory as one string or bytes object
+# Returns True if the file was written, False if it was already identical
+def write_stream(dest_path, produce):
+    stream = ComparingStream(dest_path, f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        produce(stream)
+        written = stream.finish()
+        stream.close()
+        if written:
+            os.replace(stream.tmp_path, dest_path)
+    except BaseException:
+        stream.close()
+        if os.path.exists(stream.tmp_path):
+            os.remove(stream.tmp_path)
+        raise
+    return written
+
+
+# Class receiving text for an output file and comparing it with the file already there
+# Nothing is written while the text matches; at the first difference the temporary file is
+# started with the matching prefix copied from the existing file, and the rest goes after it
+class ComparingStream:
+    def __init__(self, dest_path, tmp_path):
+        self.tmp_path = tmp_path
+        self.tmp_file = None
+        # Bytes received so far
+        self.size = 0
+        try:
+            self.existing = open(dest_path, "rb")
+        except FileNotFoundError:
+            self.existing = None
+
+    def write(self, text):
+        # Encode a chunk and compare it with the existing file until the first difference
+        data = text.encode()
+        if self.tmp_file is None:
+            if self.existing is not None and self.existing.read(len(data)) == data:
+                self.size += len(data)
+                return
+            self.diverge()
+        self.tmp_file.write(data)
+        self.size += len(data)
+
+    def diverge(self):
+        # Open the temporary file and copy over the prefix that matched the existing file
+        self.tmp_file = open(self.tmp_path, "wb")
+        if self.existing is not None:
+            self.existing.seek(0)
+            remaining = self.size
+            while remaining > 0:
+                chunk = self.existing.read(min(remaining, 65536))
+                self.tmp_file.write(chunk)
+                remaining -= len(chunk)
+
+    def finish(self):
+        # Return True if the temporary file must replace the destination
+        # A missing file, or one with bytes past the end of the new text, still differs
+        if self.tmp_file is None and (self.existing is None or self.existing.read(1) != b""):
+            self.diverge()
+        return self.tmp_file is not None
+
+    def close(self):
+        # Close the temporary and existing files
+        if self.tmp_file is not None:
+            self.tmp_file.close()
+        if self.existing is not None:
+            self.existing.close()
+
+
+# Function to check if a file exists with exactly the given contents
+def is_identical(dest_path, data):
+    try:
+        # Comparing sizes first avoids reading files that obviously differ
+        if os.path.getsize(dest_path) != len(data):
+            return False
+        with open(dest_path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+# Class writing output files from a bounded queue drained by a pool of threads
+# submit blocks once max_pending writes are queued, so rendering can't outrun the disk by much
+class OutputWriter:
+    def __init__(self, workers=4, max_pending=64):
+        self.queue = queue.Queue(maxsize=max_pending)
+        # Directories already created by this writer, so each one costs a single makedirs
+        self.created_dirs = set()
+        self.lock = threading.Lock()
+        # Failed writes as (destination path, exception) pairs, and counts of finished writes
+        self.errors = []
+        self.written = 0
+        self.unchanged = 0
+        self.threads = [threading.Thread(target=self.drain, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, dest_path, data):
+        # Queue bytes to be written to dest_path, or a function streaming text into a file-like
+        # object, which is called by the writer thread with write_stream
+        self.queue.put((str(dest_path), data))
+
+    def drain(self):
+        # Worker loop: write queued outputs until the None sentinel arrives
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            dest_path, data = item
+            try:
+                self.ensure_dir(os.path.dirname(dest_path))
+                if callable(data):
+                    written = write_stream(dest_path, data)
+                else:
+                    written = write_output(dest_path, data)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append((dest_path, e))
+                continue
+            with self.lock:
+                if written:
+                    self.written += 1
+                else:
+                    self.unchanged += 1
+
+    def ensure_dir(self, dir_path):
+        # Create a destination directory the first time any output needs it
+        if dir_path == "" or dir_path in self.created_dirs:
+            return
+        os.makedirs(dir_path, exist_ok=True)
+        with self.lock:
+            self.created_dirs.add(dir_path)
+
+    def close(self):
+        # Wait for every queued write to finish and stop the threads
+        # Returns the list of failed writes
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        # Return a string representation with the write counts so far
+        return f"OutputWriter(written: {self.written}, unchanged: {self.unchanged}, errors: {len(self.errors)})"
@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from assetrefs import relative_asset_path
+from outputwriter import write_output
+from walker import kind_dir, walk_assets
+
+# Bump this whenever the layout of the precompression cache changes
+precompress_cache_version = 1
+
+# Text outputs worth compressing; images and fonts are already compressed
+compressible_extensions = (".html", ".css", ".js", ".mjs", ".svg", ".json", ".xml", ".txt")
+
+# Files smaller than this many bytes are served uncompressed; the headers would eat the savings
+default_min_size = 1024
+
+
+# Function to gzip bytes reproducibly: a fixed header mtime keeps identical pages byte-identical
+def gzip_bytes(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# Function to compress bytes in the zlib format used by the HTTP "deflate" content coding
+def deflate_bytes(data, level):
+    return zlib.compress(data, level)
+
+
+# Compressed variants written next to each output: format name -> (file suffix, compress function)
+compression_formats = {
+    "gz": (".gz", gzip_bytes),
+    "deflate": (".zz", deflate_bytes),
+}
+
+# File suffixes of every variant format, for cleaning up variants whatever wrote them
+variant_suffixes = tuple(suffix for suffix, _ in compression_formats.values())
+
+
+# Function to check if an output is a text file worth precompressing
+def is_compressible(path):
+    return path.endswith(compressible_extensions)
+
+
+# Function to write the compressed variants of one output
+# Returns (relative path, content hash, True if any variant was written); an output whose hash
+# matches cached_hash and whose variants all exist is only hashed, not compressed again
+def compress_output(path, relative, formats, level, cached_hash):
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == cached_hash and variants_exist(path, formats):
+        return relative, digest, False
+    for name in formats:
+        suffix, compress = compression_formats[name]
+        write_output(path + suffix, compress(data, level))
+    return relative, digest, True
+
+
+# Function to check that every compressed variant of an output exists
+def variants_exist(path, formats):
+    return all(os.path.exists(path + compression_formats[name][0]) for name in formats)
+
+
+# Function to delete the compressed variants of an output in the given formats
+def remove_variants(path, formats):
+    for name in formats:
+        variant = path + compression_formats[name][0]
+        if os.path.exists(variant):
+            os.remove(variant)
+            print(f" * removed {variant}")
+
+
+# Function to load the previous build's cache as (files, formats, level), or an empty one if it
+# is missing or outdated; files maps each output's path relative to public to [size, mtime_ns, hash]
+def load_precompress_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}, [], None
+    if data.get("version") != precompress_cache_version:
+        return {}, [], None
+    return data["files"], data["formats"], data["level"]
+
+
+# Function to save the size, mtime and content hash of every precompressed output
+def save_precompress_cache(cache_path, files, formats, level):
+    data = {"version": precompress_cache_version, "formats": sorted(formats), "level": level, "files": files}
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+# Function to write compressed variants (index.html.gz, ...) next to the text outputs in public
+# Outputs whose size and mtime match the cache are skipped without being read, and ones whose
+# content hash is unchanged aren't compressed again; compression runs in a thread pool since
+# zlib and gzip release the GIL while compressing
+# paths limits the pass to those outputs (a shard's), otherwise the whole public tree is scanned;
+# variants of outputs that are gone, or fell below min_size, are deleted
+# Returns (number of outputs compressed, number unchanged)
+def precompress_outputs(
+    public_dir, cache_path, formats=("gz",), min_size=default_min_size, level=9, workers=None, paths=None
+):
+    for name in formats:
+        if name not in compression_formats:
+            raise ValueError(f"Invalid compression format: {name}")
+    cached, cached_formats, cached_level = load_precompress_cache(cache_path)
+    # Variants written at another level must all be redone; a format added since the last
+    # build is caught by variants_exist
+    recompress = cached_level != level
+    if paths is None:
+        paths = [item.source for item in walk_assets(public_dir, public_dir) if item.kind != kind_dir]
+    files = {}
+    stale = []
+    for path in paths:
+        if not is_compressible(path) or not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        if stat.st_size < min_size:
+            continue
+        relative = relative_asset_path(path, public_dir)
+        entry = cached.get(relative)
+        if entry is None or recompress:
+            stale.append((path, relative, stat, None))
+        elif entry[:2] == [stat.st_size, stat.st_mtime_ns] and variants_exist(path, formats):
+            files[relative] = entry
+        else:
+            stale.append((path, relative, stat, entry[2]))
+
+    compressed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(compress_output, path, relative, formats, level, cached_hash)
+            for path, relative, _, cached_hash in stale
+        ]
+        # Re-raise the first compression error, if any
+        for (path, _, stat, _), future in zip(stale, futures):
+            relative, digest, written = future.result()
+            files[relative] = [stat.st_size, stat.st_mtime_ns, digest]
+            if written:
+                print(f" * {path} -> {', '.join(compression_formats[name][0] for name in formats)}")
+                compressed += 1
+
+    # Drop variants nothing produces anymore: of vanished or shrunk outputs, and of dropped formats
+    dropped = [name for name in cached_formats if name not in formats and name in compression_formats]
+    for relative in cached:
+        path = os.path.join(public_dir, relative)
+        if relative not in files:
+            remove_variants(path, [name for name in cached_formats if name in compression_formats])
+        elif dropped:
+            remove_variants(path, dropped)
+
+    save_precompress_cache(cache_path, files, formats, level)
+    print(f" * {compressed} outputs precompressed, {len(files) - compressed} unchanged")
+    return compressed, len(files) - compressed
+
+
+# Function to delete every variant a previous pass wrote, along with its cache, once
+# precompression is turned off; otherwise servers would keep serving outdated copies
+# Returns the number of outputs whose variants were removed
+def remove_precompressed(public_dir, cache_path):
+    files, formats, _ = load_precompress_cache(cache_path)
+    for relative in files:
+        remove_variants(os.path.join(public_dir, relative), [name for name in formats if name in compression_formats])
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    return len(files)
+
+
+# Function to delete the variants in public whose output is gone or was written after them
+# The output tree is checked rather than a cache, so variants left by builds with other shard
+# or precompression settings are caught too; paths limits the pass to those outputs' variants,
+# otherwise the whole public tree is scanned
+# Returns the number of variants removed
+def remove_stale_variants(public_dir, paths=None):
+    if paths is None:
+        variants = [
+            item.source
+            for item in walk_assets(public_dir, public_dir)
+            if item.kind != kind_dir and item.source.endswith(variant_suffixes)
+        ]
+    else:
+        variants = [path + suffix for path in paths for suffix in variant_suffixes]
+    removed = 0
+    for variant in variants:
+        source = variant[: variant.rfind(".")]
+        # Compressed files that aren't variants of a text output, such as a shipped .tar.gz, stay
+        if not is_compressible(source):
+            continue
+        try:
+            variant_mtime = os.stat(variant).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        try:
+            if os.stat(source).st_mtime_ns <= variant_mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        os.remove(variant)
+        print(f" * removed {variant}")
+        removed += 1
+    return removed
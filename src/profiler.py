@@ -0,0 +1,145 @@
+import contextlib
+import json
+import os
+import time
+
+# Callables notified of every build event; each receives one event dict
+build_hooks = []
+
+
+# Function to register a hook that receives build events
+def add_build_hook(hook):
+    build_hooks.append(hook)
+
+
+# Function to unregister a hook added with add_build_hook
+def remove_build_hook(hook):
+    build_hooks.remove(hook)
+
+
+# Function to check if anyone is listening, so callers can skip collecting stats otherwise
+def hooks_active():
+    return len(build_hooks) > 0
+
+
+# Function to send an event dict to every registered hook
+def emit(event):
+    for hook in build_hooks:
+        hook(event)
+
+
+# Context manager timing a build stage and emitting a "stage" event when it ends
+@contextlib.contextmanager
+def stage(name):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        if build_hooks:
+            emit(
+                {
+                    "type": "stage",
+                    "name": name,
+                    "start": start,
+                    "wall": time.perf_counter() - start,
+                    "cpu": time.process_time() - cpu_start,
+                    "pid": os.getpid(),
+                }
+            )
+
+
+# Function to count the nodes in an HTMLNode tree without recursion
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+# Class collecting stage and page events into a timing report and a JSON trace
+class BuildProfiler:
+    def __init__(self):
+        # Events in the order they were received
+        self.stages = []
+        self.pages = []
+        self.origin = time.perf_counter()
+
+    def __call__(self, event):
+        # Hook entry point: file each event by its type
+        if event["type"] == "stage":
+            self.stages.append(event)
+        elif event["type"] == "page":
+            self.pages.append(event)
+
+    def totals(self):
+        # Sum the per-page counters over the whole build
+        totals = {"pages": len(self.pages), "nodes": 0, "bytes_read": 0, "bytes_written": 0}
+        for page in self.pages:
+            for key in ("nodes", "bytes_read", "bytes_written"):
+                totals[key] += page[key]
+        return totals
+
+    def report(self, top=10):
+        # Return a human readable report with stage times and the slowest pages
+        lines = ["Build profile:", f"{'stage':<28} {'wall ms':>10} {'cpu ms':>10}"]
+        for event in self.stages:
+            lines.append(f"{event['name']:<28} {event['wall'] * 1000:>10.1f} {event['cpu'] * 1000:>10.1f}")
+        totals = self.totals()
+        lines.append(
+            f"{totals['pages']} pages, {totals['nodes']} nodes, "
+            f"{totals['bytes_read']} bytes read, {totals['bytes_written']} bytes written"
+        )
+        slowest = sorted(self.pages, key=lambda page: page["wall"], reverse=True)[:top]
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} pages:")
+            lines.append(f"{'wall ms':>10} {'cpu ms':>10} {'nodes':>8} {'bytes':>10}  page")
+            for page in slowest:
+                lines.append(
+                    f"{page['wall'] * 1000:>10.1f} {page['cpu'] * 1000:>10.1f} "
+                    f"{page['nodes']:>8} {page['bytes_read']:>10}  {page['path']}"
+                )
+        return "\n".join(lines)
+
+    def to_json(self):
+        # Return a machine-readable trace with every event, times relative to profiler start
+        def relative(event):
+            event = dict(event)
+            event["start"] = event["start"] - self.origin
+            return event
+
+        return {
+            "stages": [relative(event) for event in self.stages],
+            "pages": [relative(event) for event in self.pages],
+            "totals": self.totals(),
+        }
+
+    def to_chrome_trace(self):
+        # Return the events in Chrome trace format, viewable in chrome://tracing or Perfetto
+        trace_events = []
+        for event in self.stages + self.pages:
+            name = event["name"] if event["type"] == "stage" else event["path"]
+            args = {key: value for key, value in event.items() if key not in ("start", "wall", "pid")}
+            trace_events.append(
+                {
+                    "name": name,
+                    "cat": event["type"],
+                    "ph": "X",
+                    "ts": (event["start"] - self.origin) * 1e6,
+                    "dur": event["wall"] * 1e6,
+                    "pid": 0,
+                    "tid": event["pid"],
+                    "args": args,
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write(self, path, chrome=False):
+        # Write the JSON trace (or Chrome trace) to path
+        data = self.to_chrome_trace() if chrome else self.to_json()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
@@ -0,0 +1,115 @@
+import argparse
+import hashlib
+import json
+import os
+
+from manifest import hash_file
+
+# Directory inside the public tree holding one manifest per shard until the shards are merged
+shard_dir_name = ".shards"
+
+
+# Function to parse a --shard value "i/N" into (i, N), with shards numbered from 1
+def parse_shard(text):
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {text!r}, expected i/N such as 2/4")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard {text!r}, i must be between 1 and N")
+    return index, count
+
+
+# Function to pick the shard a content file belongs to from its path relative to the content
+# directory; the path is hashed in POSIX form so every machine computes the same partition
+def shard_of(relative_path, count):
+    key = relative_path.replace(os.sep, "/").encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % count + 1
+
+
+# Function to check if a content file belongs to the given (i, N) shard
+def in_shard(relative_path, shard):
+    index, count = shard
+    return shard_of(relative_path, count) == index
+
+
+# Function to return the path of a shard's manifest inside the public directory
+def shard_manifest_path(public_dir, shard):
+    index, count = shard
+    return os.path.join(public_dir, shard_dir_name, f"shard-{index}-of-{count}.json")
+
+
+# Function to record the outputs a shard produced, with their content hashes, for merge_shards
+def write_shard_manifest(public_dir, shard, dest_paths):
+    outputs = {}
+    for dest_path in dest_paths:
+        if os.path.exists(dest_path):
+            relative = os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+            outputs[relative] = hash_file(dest_path)
+    path = shard_manifest_path(public_dir, shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"shard": list(shard), "outputs": outputs}, f, indent=1, sort_keys=True)
+    return path
+
+
+# Function to list the HTML files in a public tree as sorted POSIX paths relative to it,
+# leaving out the shard manifests
+def page_outputs(public_dir):
+    outputs = []
+    for dir_path, dir_names, file_names in os.walk(public_dir):
+        if dir_path == public_dir and shard_dir_name in dir_names:
+            dir_names.remove(shard_dir_name)
+        for name in file_names:
+            if name.endswith(".html"):
+                path = os.path.join(dir_path, name)
+                outputs.append(os.path.relpath(path, public_dir).replace(os.sep, "/"))
+    return sorted(outputs)
+
+
+# Function to check the shard manifests of a merged public tree against the expected outputs
+# Every expected output must have been produced by exactly one shard and still match its hash
+# Pages in the tree that neither belong to the site nor were claimed by a shard, such as the
+# output of deleted content that shards never remove, are reported as stale
+# Returns a list of problems, empty when the merge is complete
+def verify_shards(public_dir, expected_dest_paths):
+    shard_dir = os.path.join(public_dir, shard_dir_name)
+    if not os.path.isdir(shard_dir):
+        return [f"no shard manifests found in {shard_dir}"]
+    problems = []
+    claims = {}
+    counts = set()
+    indexes = set()
+    for name in sorted(os.listdir(shard_dir)):
+        with open(os.path.join(shard_dir, name)) as f:
+            data = json.load(f)
+        index, count = data["shard"]
+        counts.add(count)
+        indexes.add(index)
+        for relative, digest in data["outputs"].items():
+            claims.setdefault(relative, []).append((index, digest))
+    if len(counts) != 1:
+        return [f"shard manifests disagree on the number of shards: {sorted(counts)}"]
+    count = counts.pop()
+    for index in range(1, count + 1):
+        if index not in indexes:
+            problems.append(f"missing manifest for shard {index}/{count}")
+    expected = {os.path.relpath(path, public_dir).replace(os.sep, "/") for path in expected_dest_paths}
+    for relative in sorted(expected | set(claims)):
+        shards = claims.get(relative, [])
+        if relative not in expected:
+            problems.append(f"{relative}: produced by shard {shards[0][0]} but not expected")
+        elif not shards:
+            problems.append(f"{relative}: not produced by any shard")
+        elif len(shards) > 1:
+            problems.append(f"{relative}: produced by shards {', '.join(str(index) for index, _ in shards)}")
+        else:
+            dest_path = os.path.join(public_dir, relative)
+            if not os.path.exists(dest_path):
+                problems.append(f"{relative}: missing from the merged tree")
+            elif hash_file(dest_path) != shards[0][1]:
+                problems.append(f"{relative}: differs from what shard {shards[0][0]} wrote")
+    for relative in page_outputs(public_dir):
+        if relative not in expected and relative not in claims:
+            problems.append(f"{relative}: stale page not produced by any shard")
+    return problems
@@ -0,0 +1,175 @@
+import os
+import re
+
+import fingerprint
+from htmlnode import collapse_whitespace, preformatted_tags
+
+# Matches placeholders such as {{ Title }} or {{Content}}
+placeholder_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Matches partial includes such as {{> partials/header.html }}, resolved relative to the including file
+include_pattern = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+# Matches comments, doctypes and tags, capturing a tag's "/" and name
+markup_pattern = re.compile(r"<!--.*?-->|<!.*?>|<(/?)([A-Za-z][\w:-]*)[^>]*>", re.S)
+
+# Elements around which whitespace never renders, so a minified template drops it there
+block_tags = frozenset(
+    "address article aside blockquote body br dd details div dl dt fieldset figcaption figure footer "
+    "form h1 h2 h3 h4 h5 h6 head header hgroup hr html li link main menu meta nav ol p pre section "
+    "table tbody td tfoot th thead title tr ul".split()
+)
+
+
+# Class representing a template split into static segments and placeholder slots
+class Template:
+    def __init__(self, source, dependencies=(), references=(), minify=False, omit_end_tags=False):
+        # Files the template was compiled from: the template itself followed by its partials
+        self.dependencies = list(dependencies)
+        # src and href URLs of the template as written, before any fingerprinting
+        self.references = list(references)
+        # A minified template is minified once here, and serializes node values minified too
+        self.minify = minify
+        self.omit_end_tags = omit_end_tags
+        if minify:
+            source = minify_source(source)
+        # segments[i] is the static text before slots[i]; the last segment follows the last slot
+        self.segments = []
+        # Each slot is (placeholder name, original placeholder text)
+        self.slots = []
+        pos = 0
+        for match in placeholder_pattern.finditer(source):
+            self.segments.append(source[pos : match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.segments.append(source[pos:])
+
+    def render(self, values):
+        # Fill the slots from values in a single join; unknown placeholders are left as written
+        parts = [self.segments[0]]
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            parts.append(values.get(name, placeholder))
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, stream, values):
+        # Stream the filled template to a file-like object
+        # Values with a write_html method (HTMLNode trees) are serialized straight into the stream
+        stream.write(self.segments[0])
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name, placeholder)
+            if hasattr(value, "write_html"):
+                value.write_html(stream, minify=self.minify, omit_end_tags=self.omit_end_tags)
+            else:
+                stream.write(value)
+            stream.write(segment)
+
+    def __repr__(self):
+        # Return a string representation listing the placeholder names
+        return f"Template(slots: {[name for name, _ in self.slots]})"
+
+
+# Function to minify a template source: comments are dropped, whitespace runs outside pre,
+# code, textarea, script and style collapse to one space, and whitespace next to a block-level
+# tag is dropped; placeholders are plain text here, so they survive with their spacing collapsed
+def minify_source(source):
+    # Split the source into text (a str) and markup kept as written, as (html, is block boundary);
+    # a dropped comment merges the text around it
+    tokens = [""]
+    # Name of the preformatted element being copied verbatim, if any
+    verbatim = None
+    pos = 0
+    for match in markup_pattern.finditer(source):
+        text = source[pos : match.start()]
+        pos = match.end()
+        name = (match.group(2) or "").lower()
+        closing = match.group(1) == "/"
+        if verbatim is not None:
+            tokens.append((text, False))
+            if name == verbatim and closing:
+                verbatim = None
+                tokens.append((match.group(0), name in block_tags))
+                tokens.append("")
+            else:
+                tokens.append((match.group(0), False))
+            continue
+        tokens[-1] += text
+        if match.group(0).startswith("<!--"):
+            continue
+        # Doctypes count as block boundaries, like the elements that follow them
+        tokens.append((match.group(0), name == "" or name in block_tags))
+        if name in preformatted_tags and not closing:
+            verbatim = name
+        tokens.append("")
+    if verbatim is not None:
+        tokens.append((source[pos:], False))
+    else:
+        tokens[-1] += source[pos:]
+
+    parts = []
+    for i, token in enumerate(tokens):
+        if not isinstance(token, str):
+            parts.append(token[0])
+            continue
+        text = collapse_whitespace(token)
+        if i == 0 or tokens[i - 1][1]:
+            text = text.lstrip(" ")
+        if i == len(tokens) - 1 or tokens[i + 1][1]:
+            text = text.rstrip(" ")
+        parts.append(text)
+    return "".join(parts)
+
+
+# Function to inline every partial included by a template source, recursively
+# Returns (expanded source, list of partial paths in include order)
+def expand_includes(source, base_dir, including=()):
+    partials = []
+
+    def include(match):
+        partial_path = os.path.normpath(os.path.join(base_dir, match.group(1)))
+        if partial_path in including:
+            raise ValueError(f"Template include cycle: {partial_path}")
+        with open(partial_path, "r") as f:
+            partial_source = f.read()
+        expanded, nested = expand_includes(
+            partial_source, os.path.dirname(partial_path), including + (partial_path,)
+        )
+        if partial_path not in partials:
+            partials.append(partial_path)
+        partials.extend(path for path in nested if path not in partials)
+        return expanded
+
+    return include_pattern.sub(include, source), partials
+
+
+# Compiled templates keyed by path and minify options, along with the mtime of every file they
+# were compiled from and the fingerprinted asset URLs they were rewritten with
+_template_cache = {}
+
+
+# Function to check that none of the files a template was compiled from changed
+def _stamps_match(stamps):
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime for path, mtime in stamps)
+    except FileNotFoundError:
+        return False
+
+
+# Function to load and compile a template, reusing the compiled copy until it or a partial changes
+# When asset fingerprinting is enabled, src and href attributes point at the fingerprinted files
+def load_template(template_path, minify=False, omit_end_tags=False):
+    template_path = str(template_path)
+    key = (template_path, minify, omit_end_tags)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[1] == fingerprint.asset_urls_digest and _stamps_match(cached[0]):
+        return cached[2]
+    mtime = os.stat(template_path).st_mtime_ns
+    with open(template_path, "r") as f:
+        source, partials = expand_includes(
+            f.read(), os.path.dirname(template_path), (os.path.normpath(template_path),)
+        )
+    dependencies = [os.path.normpath(template_path)] + partials
+    # The template's own mtime is taken before reading so a concurrent edit forces a reload
+    stamps = [(template_path, mtime)] + [(path, os.stat(path).st_mtime_ns) for path in partials]
+    references = fingerprint.attribute_urls(source)
+    template = Template(fingerprint.rewrite_attribute_urls(source), dependencies, references, minify, omit_end_tags)
+    _template_cache[key] = (stamps, fingerprint.asset_urls_digest, template)
+    return template
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from assetrefs import css_references, referenced_static_files
+from testutil import write_file
+
+
+class TestCssReferences(unittest.TestCase):
+    # Test case for quoted and unquoted url() references and @import rules
+    def test_css_references(self):
+        css = """@import "theme.css";
+        body { background: url(images/bg.png) }
+        h1 { background: url( "/images/h1.png" ) }
+        .x { background: url('data:image/png;base64,AAAA') }"""
+        self.assertEqual(
+            css_references(css),
+            ["theme.css", "images/bg.png", "/images/h1.png", "data:image/png;base64,AAAA"],
+        )
+
+
+class TestReferencedStaticFiles(unittest.TestCase):
+    def setUp(self):
+        # Lay out a static tree with used, unused and stylesheet-only assets
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = self.tmp.name
+        write_file(os.path.join(self.static, "index.css"), '@import "css/theme.css";')
+        write_file(os.path.join(self.static, "css", "theme.css"), "body { background: url(../images/bg.png) }")
+        for name in ["bg.png", "used.png", "unused.png"]:
+            write_file(os.path.join(self.static, "images", name), "png")
+        write_file(os.path.join(self.static, "docs", "index.html"), "<p>docs</p>")
+        write_file(os.path.join(self.static, "extra.txt"), "text")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for page references, directory URLs, the allowlist and stylesheet references
+    def test_referenced_static_files(self):
+        targets = ["/images/used.png", "/docs/", "/majesty", "/images/missing.png"]
+        self.assertEqual(
+            referenced_static_files(self.static, targets),
+            {"index.css", "css/theme.css", "images/bg.png", "images/used.png", "docs/index.html"},
+        )
+
+    # Test case for a custom allowlist replacing the default
+    def test_allowlist(self):
+        self.assertEqual(referenced_static_files(self.static, [], ["*.txt"]), {"extra.txt"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from benchmark import extend_baseline, find_regressions, run_benchmarks
+from corpus import CorpusOptions, generate_corpus
+from gencontent import extract_title
+from markdown_blocks import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    # Test case for the generator producing the same corpus for the same seed
+    def test_deterministic(self):
+        options = CorpusOptions(pages=5, images=1, image_size=16)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            paths_a = generate_corpus(a, options)
+            paths_b = generate_corpus(b, options)
+            self.assertEqual([os.path.relpath(p, a) for p in paths_a], [os.path.relpath(p, b) for p in paths_b])
+            for path_a, path_b in zip(paths_a, paths_b):
+                with open(path_a) as f_a, open(path_b) as f_b:
+                    self.assertEqual(f_a.read(), f_b.read())
+
+    # Test case for every generated page being valid markdown for the site generator
+    def test_pages_render(self):
+        options = CorpusOptions(pages=20, depth=3, link_density=0.3, images=2, image_size=16)
+        with tempfile.TemporaryDirectory() as root:
+            for path in generate_corpus(root, options):
+                with open(path) as f:
+                    markdown = f.read()
+                extract_title(markdown)
+                markdown_to_html_node(markdown).to_html()
+
+
+class TestBenchmark(unittest.TestCase):
+    # Test case for a tiny benchmark run reporting every stage
+    def test_run_benchmarks(self):
+        options = CorpusOptions(pages=3, blocks_per_page=4, images=1, image_size=16)
+        with tempfile.TemporaryDirectory() as root:
+            results = run_benchmarks(root, options, repeat=1)
+        self.assertEqual(
+            list(results),
+            [
+                "markdown_to_blocks",
+                "block_to_block_type",
+                "text_to_textnodes",
+                "markdown_to_html_node",
+                "to_html",
+                "markdown_to_html",
+                "template_fill",
+                "file_write",
+                "copy_files_recursive",
+            ],
+        )
+        self.assertEqual(results["markdown_to_html_node"]["items"], 3)
+
+    # Test case for regressions being reported only beyond the tolerance
+    def test_find_regressions(self):
+        baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}
+        results = {"a": {"seconds": 1.2}, "b": {"seconds": 1.5}, "c": {"seconds": 9.0}}
+        self.assertEqual(find_regressions(results, baseline, 0.25), [("b", 1.5)])
+
+    # Test case for stages missing from a stored baseline being added, and existing ones kept
+    def test_extend_baseline(self):
+        baseline = {"a": {"seconds": 1.0}}
+        self.assertEqual(extend_baseline(baseline, {"a": {"seconds": 2.0}, "c": {"seconds": 3.0}}), ["c"])
+        self.assertEqual(baseline, {"a": {"seconds": 1.0}, "c": {"seconds": 3.0}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import markdown_to_html_node
+
+markdown = """
+# Title
+
+This is **bolded** paragraph
+
+* a
+* list
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "blocks.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for cached rendering producing the same HTML as uncached rendering
+    def test_same_output(self):
+        expected = markdown_to_html_node(markdown).to_html()
+        cache = BlockCache(self.path, 1)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+    # Test case for entries persisting across cache instances
+    def test_persistent(self):
+        cache = BlockCache(self.path, 1)
+        cache.put("block", "<p>block</p>")
+        cache.close()
+        cache = BlockCache(self.path, 1)
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        cache.close()
+
+    # Test case for links and images stored next to a block's HTML
+    def test_references(self):
+        cache = BlockCache(self.path, 1)
+        cache.put("links", "<p>l</p>", (["/a", "/b"], ["/c.png"]))
+        cache.put("plain", "<p>p</p>", ([], []))
+        cache.put("unknown", "<p>u</p>")
+        cache.close()
+        cache = BlockCache(self.path, 1)
+        self.assertEqual(cache.lookup("links"), ("<p>l</p>", ["/a", "/b"], ["/c.png"]))
+        self.assertEqual(cache.lookup("plain"), ("<p>p</p>", [], []))
+        self.assertEqual(cache.lookup("unknown"), ("<p>u</p>", None, None))
+        self.assertIsNone(cache.lookup("missing"))
+        cache.close()
+
+    # Test case for a database written in an older table layout being rebuilt
+    def test_old_format(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute("INSERT INTO meta VALUES ('version', '1')")
+        connection.execute("CREATE TABLE blocks (key TEXT PRIMARY KEY, html TEXT, size INTEGER, used REAL)")
+        connection.commit()
+        connection.close()
+        cache = BlockCache(self.path, 1)
+        self.assertIsNone(cache.get("block"))
+        cache.put("block", "<p>block</p>", ([], []))
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        cache.close()
+
+    # Test case for a renderer version change invalidating the cache
+    def test_version_invalidates(self):
+        cache = BlockCache(self.path, 1)
+        cache.put("block", "<p>block</p>")
+        cache.close()
+        cache = BlockCache(self.path, 2)
+        self.assertIsNone(cache.get("block"))
+        cache.close()
+
+    # Test case for least recently used entries being evicted first
+    def test_lru_eviction(self):
+        cache = BlockCache(self.path, 1, max_bytes=20)
+        cache.put("old", "x" * 10)
+        cache.put("new", "y" * 10)
+        cache.flush()
+        cache.get("old")
+        cache.flush()
+        cache.put("newest", "z" * 10)
+        cache.flush()
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("new"))
+        self.assertEqual(cache.get("old"), "x" * 10)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from copystatic import copy_files_recursive, sync_static
+from manifest import BuildManifest
+from testutil import write_file
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        # Lay out a static tree and an empty public directory
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, **options):
+        # Run one sync with a manifest persisted between calls, returning the transfers
+        manifest = BuildManifest.load(self.manifest_path)
+        transfers = sync_static(self.static, self.public, manifest, **options)
+        manifest.remove_stale(self.public)
+        manifest.save()
+        return transfers
+
+    # Test case for unchanged files being skipped on the second sync
+    def test_skips_unchanged(self):
+        self.assertEqual(len(self.sync()), 2)
+        self.assertEqual(self.sync(), [])
+
+    # Test case for a modified file being the only one transferred
+    def test_copies_changed(self):
+        self.sync()
+        write_file(os.path.join(self.static, "index.css"), "body { color: red }")
+        transfers = self.sync()
+        self.assertEqual([os.path.basename(from_path) for from_path, _ in transfers], ["index.css"])
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    # Test case for checksum mode ignoring mtime-only changes
+    def test_checksum_ignores_touch(self):
+        self.sync(checksum=True)
+        os.utime(os.path.join(self.static, "index.css"), (0, 0))
+        self.assertEqual(self.sync(checksum=True), [])
+
+    # Test case for orphaned files being removed
+    def test_removes_orphans(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.sync()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+
+    # Test case for files left out of only being skipped, and pruned once already synced
+    def test_only(self):
+        self.sync()
+        self.assertEqual(len(self.sync(only={"index.css"})), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_files_recursive(self.static, os.path.join(self.tmp.name, "copy"), only={"images/a.png"})
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "copy")), ["images"])
+
+    # Test case for hardlink mode sharing the source inode
+    def test_hardlink(self):
+        self.sync(method="hardlink")
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.public, "index.css"))
+        )
+
+    # Test case for reflink mode producing an identical file even without filesystem support
+    def test_reflink(self):
+        self.sync(method="reflink", workers=1)
+        with open(os.path.join(self.public, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    # Test case for unknown transfer methods
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            self.sync(method="teleport")
+
+
+if __name__ == "__main__":
+    unittest.main()
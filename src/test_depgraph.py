@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph, page_dependencies, referenced_assets
+from manifest import BuildManifest
+
+
+class TestReferencedAssets(unittest.TestCase):
+    # Test case for images and file links being assets while page links and external URLs are not
+    def test_referenced_assets(self):
+        markdown = (
+            "![a](/images/a.png) [home](/) [post](/blog/post) [pdf](/files/a.pdf#p2) "
+            "![b](https://example.com/b.png) ![a again](/images/a.png?v=1) [cdn](//cdn.example.com/x.js)"
+        )
+        self.assertEqual(referenced_assets(markdown), ["/images/a.png", "/files/a.pdf"])
+
+
+class TestPageDependencies(unittest.TestCase):
+    # Test case for a page depending on its template, the template's partials and its assets
+    def test_page_dependencies(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{> header.html }}{{ Content }}")
+            with open(os.path.join(tmp, "header.html"), "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            static = os.path.join(tmp, "static")
+            self.assertEqual(
+                page_dependencies("![a](/images/a.png)", template, static),
+                [template, os.path.join(tmp, "header.html"), os.path.join(static, "images", "a.png")],
+            )
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph()
+        self.graph.set_dependencies("./content/a.md", ["./template.html", "static/images/a.png"])
+        self.graph.set_dependencies("content/b.md", ["template.html", "partials/nav.html"])
+
+    # Test case for queries matching normalized paths
+    def test_affected_by(self):
+        self.assertEqual(self.graph.affected_by("template.html"), ["content/a.md", "content/b.md"])
+        self.assertEqual(self.graph.affected_by("./static/images/a.png"), ["content/a.md"])
+        self.assertEqual(self.graph.affected_by("partials/nav.html", "content/a.md"), ["content/a.md", "content/b.md"])
+        self.assertEqual(self.graph.affected_by("static/index.css"), [])
+
+    # Test case for replacing and removing a page's dependencies
+    def test_update_and_remove(self):
+        self.graph.set_dependencies("content/b.md", ["template.html"])
+        self.assertEqual(self.graph.affected_by("partials/nav.html"), [])
+        self.graph.remove_page("content/a.md")
+        self.assertEqual(self.graph.affected_by("template.html"), ["content/b.md"])
+        self.assertEqual(self.graph.files(), ["template.html"])
+        self.assertEqual(self.graph.dependencies_of("content/a.md"), [])
+
+    # Test case for rebuilding the graph from a manifest's page entries
+    def test_from_manifest(self):
+        manifest = BuildManifest("unused.json")
+        manifest.entries["pages"]["public/a.html"] = {
+            "source": "./content/a.md",
+            "source_hash": "x",
+            "dependencies": {"template.html": "y"},
+            "assets": ["/images/a.png"],
+        }
+        graph = DependencyGraph.from_manifest(manifest, "./static")
+        self.assertEqual(graph.dependencies_of("content/a.md"), ["static/images/a.png", "template.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from devserver import SiteWatcher
+from testutil import write_file
+
+
+# Helper to read a whole file
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        # Build a small site and a watcher over it in a temporary directory
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        write_file(self.template, "<title>{{ Title }}</title>")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "post", "index.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    # Test case for an edited page being the only page rebuilt
+    def test_rebuilds_changed_page_only(self):
+        write_file(os.path.join(self.content, "post", "index.md"), "# Edited post")
+        changed = self.watcher.poll()
+        self.assertEqual(changed, [os.path.join(self.content, "post", "index.md")])
+        self.assertEqual(read_file(os.path.join(self.public, "post", "index.html")), "<title>Edited post</title>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    # Test case for a template edit rebuilding every page
+    def test_template_change_rebuilds_all_pages(self):
+        write_file(self.template, "<h1>{{ Title }}</h1>")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "index.html")), "<h1>Home</h1>")
+        self.assertEqual(read_file(os.path.join(self.public, "post", "index.html")), "<h1>Post</h1>")
+
+    # Test case for a partial edit rebuilding only the pages whose template includes it
+    def test_partial_change_rebuilds_dependent_pages(self):
+        partial = os.path.join(os.path.dirname(self.template), "header.html")
+        write_file(partial, "<title>{{ Title }}</title>")
+        write_file(self.template, "{{> header.html }}")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "index.html")), "<title>Home</title>")
+        write_file(partial, "<h2>{{ Title }}</h2>")
+        os.utime(partial, ns=(0, 1))
+        self.assertEqual(self.watcher.poll(), [partial])
+        self.assertEqual(read_file(os.path.join(self.public, "post", "index.html")), "<h2>Post</h2>")
+
+    # Test case for an asset edit rebuilding the pages that reference it
+    def test_asset_change_rebuilds_referencing_pages(self):
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/logo.png)")
+        write_file(os.path.join(self.static, "logo.png"), "png")
+        self.watcher.poll()
+        self.assertEqual(self.watcher.graph.affected_by(os.path.join(self.static, "logo.png")), [os.path.join(self.content, "index.md")])
+        os.remove(os.path.join(self.public, "index.html"))
+        write_file(os.path.join(self.static, "logo.png"), "png2")
+        os.utime(os.path.join(self.static, "logo.png"), ns=(0, 1))
+        self.watcher.poll()
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "post", "index.html")))
+
+    # Test case for static assets being copied and removed
+    def test_static_changes(self):
+        write_file(os.path.join(self.static, "images", "a.png"), "png")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "images", "a.png")), "png")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+
+    # Test case for directories of pages appearing, moving and disappearing between polls
+    def test_directory_changes(self):
+        drafts = os.path.join(self.content, "drafts")
+        write_file(os.path.join(drafts, "deep", "a.md"), "# A")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "drafts", "deep", "a.html")), "<title>A</title>")
+        # Files created in a directory that appeared after the last poll are watched too
+        write_file(os.path.join(drafts, "deep", "b.md"), "# B")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "drafts", "deep", "b.html")), "<title>B</title>")
+        os.rename(drafts, os.path.join(self.content, "posts"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "drafts")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "posts", "deep", "a.html")))
+        write_file(os.path.join(self.content, "posts", "deep", "a.md"), "# A2")
+        self.watcher.poll()
+        self.assertEqual(read_file(os.path.join(self.public, "posts", "deep", "a.html")), "<title>A2</title>")
+
+    # Test case for a broken page being reported without stopping the watcher
+    def test_bad_page_does_not_raise(self):
+        write_file(os.path.join(self.content, "index.md"), "no title here")
+        self.watcher.poll()
+        self.assertEqual(self.watcher.poll(), [])
+
+
+# The same cases with change notifications turned off, so every poll stats every source
+class TestSiteWatcherPolling(TestSiteWatcher):
+    def setUp(self):
+        super().setUp()
+        self.watcher.close()
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public, notify=False)
+        self.assertIsNone(self.watcher.notifier)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+import fingerprint
+from fingerprint import (
+    asset_manifest_name,
+    fingerprint_assets,
+    fingerprint_name,
+    publish_assets,
+    rewrite_attribute_urls,
+    set_asset_urls,
+)
+from blockcache import BlockCache
+from manifest import BuildManifest
+from markdown_blocks import HTMLBuffer, block_cache_key, markdown_to_html
+from textnode import TextNode, text_node_to_html_node, text_span_to_html, text_type_image, text_type_link
+from testutil import write_file
+
+
+# Helper to return the fingerprinted name a file with the given contents gets
+def expected_name(relative_path, contents):
+    return fingerprint_name(relative_path, hashlib.sha256(contents.encode()).hexdigest())
+
+
+class TestFingerprintAssets(unittest.TestCase):
+    def setUp(self):
+        # Lay out a static tree with an image, and a stylesheet importing another that uses it
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.cache_path = os.path.join(self.tmp.name, "cache.json")
+        write_file(os.path.join(self.static, "images", "bg.png"), "png")
+        write_file(os.path.join(self.static, "index.css"), '@import "css/theme.css";\nh1 { color: red }')
+        write_file(
+            os.path.join(self.static, "css", "theme.css"),
+            "body { background: url(../images/bg.png) }\n.x { background: url(https://example.com/a.png) }",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        set_asset_urls({})
+
+    # Test case for names of plain files, which come from their content hash
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/bg.png", "0123456789abcdef"), "images/bg.0123456789.png")
+        fingerprints = fingerprint_assets(self.static)
+        self.assertEqual(fingerprints.output_path("images/bg.png"), expected_name("images/bg.png", "png"))
+
+    # Test case for stylesheets pointing at fingerprinted URLs, leaving external ones alone
+    def test_stylesheets_rewritten(self):
+        fingerprints = fingerprint_assets(self.static)
+        bg_url = "/" + fingerprints.output_path("images/bg.png")
+        theme = f"body {{ background: url({bg_url}) }}\n.x {{ background: url(https://example.com/a.png) }}"
+        output, _, data = fingerprints.assets["css/theme.css"]
+        self.assertEqual(data.decode(), theme)
+        self.assertEqual(output, expected_name("css/theme.css", theme))
+        index = f'@import "/{output}";\nh1 {{ color: red }}'
+        self.assertEqual(fingerprints.assets["index.css"][2].decode(), index)
+
+    # Test case for a changed image renaming the stylesheets that use it, directly or through an import
+    def test_image_change_propagates(self):
+        before = fingerprint_assets(self.static).urls()
+        write_file(os.path.join(self.static, "images", "bg.png"), "new png")
+        after = fingerprint_assets(self.static).urls()
+        for url in ["/images/bg.png", "/css/theme.css", "/index.css"]:
+            self.assertNotEqual(before[url], after[url])
+
+    # Test case for import cycles, which leave the reference closing the cycle as written
+    def test_import_cycle(self):
+        write_file(os.path.join(self.static, "a.css"), '@import "b.css";')
+        write_file(os.path.join(self.static, "b.css"), '@import "a.css";')
+        fingerprints = fingerprint_assets(self.static)
+        self.assertEqual(fingerprints.assets["b.css"][2], b'@import "a.css";')
+        self.assertEqual(fingerprints.assets["a.css"][2].decode(), f'@import "/{fingerprints.output_path("b.css")}";')
+
+    # Test case for hashes reused from the cache while size and mtime are unchanged
+    def test_hash_cache(self):
+        fingerprints = fingerprint_assets(self.static, self.cache_path)
+        with open(self.cache_path) as f:
+            cache = json.load(f)
+        self.assertEqual(set(cache), {"images/bg.png"})
+        # A cached hash is trusted without reading the file
+        cache["images/bg.png"][2] = "f" * 64
+        with open(self.cache_path, "w") as f:
+            json.dump(cache, f)
+        cached = fingerprint_assets(self.static, self.cache_path)
+        self.assertEqual(cached.output_path("images/bg.png"), "images/bg.ffffffffff.png")
+        # Touching the file makes it stale again
+        os.utime(os.path.join(self.static, "images", "bg.png"), ns=(0, 0))
+        rehashed = fingerprint_assets(self.static, self.cache_path)
+        self.assertEqual(rehashed.output_path("images/bg.png"), fingerprints.output_path("images/bg.png"))
+
+    # Test case for publishing files under their fingerprinted names along with the asset manifest
+    def test_publish_assets(self):
+        fingerprints = fingerprint_assets(self.static)
+        self.assertEqual(publish_assets(self.static, self.public, fingerprints), 3)
+        for relative in ["images/bg.png", "css/theme.css", "index.css"]:
+            self.assertTrue(os.path.exists(os.path.join(self.public, fingerprints.output_path(relative))))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        with open(os.path.join(self.public, asset_manifest_name)) as f:
+            self.assertEqual(json.load(f), fingerprints.urls())
+        # Files already in place are not written again
+        self.assertEqual(publish_assets(self.static, self.public, fingerprints), 0)
+
+    # Test case for incremental publishing, where outdated fingerprints are pruned by the manifest
+    def test_publish_prunes_old_fingerprints(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        old = fingerprint_assets(self.static)
+        publish_assets(self.static, self.public, old, manifest)
+        write_file(os.path.join(self.static, "images", "bg.png"), "new png")
+        manifest = BuildManifest(manifest.path, manifest.entries)
+        new = fingerprint_assets(self.static)
+        publish_assets(self.static, self.public, new, manifest, only={"images/bg.png"})
+        removed = manifest.remove_stale(self.public)
+        self.assertIn(os.path.join(self.public, old.output_path("images/bg.png")), removed)
+        self.assertTrue(os.path.exists(os.path.join(self.public, new.output_path("images/bg.png"))))
+        with open(os.path.join(self.public, asset_manifest_name)) as f:
+            self.assertEqual(list(json.load(f)), ["/images/bg.png"])
+
+
+class TestRewriteUrls(unittest.TestCase):
+    def setUp(self):
+        set_asset_urls({"/images/bg.png": "/images/bg.0123456789.png", "/index.css": "/index.abcdef0123.css"})
+
+    def tearDown(self):
+        set_asset_urls({})
+
+    # Test case for src and href attributes in a template
+    def test_rewrite_attribute_urls(self):
+        source = '<link href="/index.css" rel="stylesheet"><a href="/majesty">x</a><img src=\'/images/bg.png\'>'
+        self.assertEqual(
+            rewrite_attribute_urls(source),
+            '<link href="/index.abcdef0123.css" rel="stylesheet"><a href="/majesty">x</a>'
+            "<img src='/images/bg.0123456789.png'>",
+        )
+
+    # Test case for link and image nodes in both render paths, given the mapping explicitly
+    def test_text_nodes(self):
+        urls = fingerprint.asset_urls
+        image = TextNode("bg", text_type_image, "/images/bg.png")
+        self.assertEqual(text_node_to_html_node(image, urls).props["src"], "/images/bg.0123456789.png")
+        self.assertEqual(text_node_to_html_node(image).props["src"], "/images/bg.png")
+        link = TextNode("page", text_type_link, "/majesty")
+        self.assertEqual(text_node_to_html_node(link, urls).props["href"], "/majesty")
+        self.assertEqual(
+            text_span_to_html("bg", text_type_image, "/images/bg.png", urls),
+            '<img src="/images/bg.0123456789.png" alt="bg"></img>',
+        )
+
+    # Test case for disabling the mapping, which restores the original URLs
+    def test_disabled(self):
+        set_asset_urls({})
+        self.assertEqual(fingerprint.asset_urls_digest, b"")
+        self.assertEqual(rewrite_attribute_urls('<img src="/images/bg.png">'), '<img src="/images/bg.png">')
+
+    # Test case for a changed asset only invalidating the cached blocks that reference it
+    def test_block_cache_keys(self):
+        markdown = "# Title\n\n![bg](/images/bg.png)\n\n[style](/index.css) and [page](/majesty)\n\nplain"
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BlockCache(os.path.join(tmp, "blocks.sqlite"), 1)
+            markdown_to_html(markdown, cache, HTMLBuffer(asset_urls=fingerprint.asset_urls))
+            urls = dict(fingerprint.asset_urls, **{"/images/bg.png": "/images/bg.fedcba9876.png"})
+            html = markdown_to_html(markdown, cache, HTMLBuffer(asset_urls=urls))
+            self.assertIn('<img src="/images/bg.fedcba9876.png" alt="bg"></img>', html)
+            self.assertIn('<a href="/index.abcdef0123.css">style</a>', html)
+            self.assertEqual((cache.hits, cache.misses), (3, 5))
+            self.assertEqual(block_cache_key("plain [page](/majesty)", urls), "plain [page](/majesty)")
+            cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
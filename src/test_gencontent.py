@@ -1,5 +1,15 @@
+import os
+import tempfile
 import unittest
-from gencontent import extract_title
+from gencontent import (
+    PageBuildError,
+    discover_pages,
+    extract_title,
+    generate_pages_parallel,
+    set_link_index,
+)
+from fingerprint import set_asset_urls
+from linkindex import LinkIndex
 
 # Test case class for testing the extract_title function
 class TestExtractTitle(unittest.TestCase):
@@ -49,6 +59,77 @@ no title
         except Exception as e:
             pass
 
+
+# Test case class for the parallel page generator
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        # Lay out a small content tree and template in a temporary directory
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "b"))
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for name, text in [("a.md", "# A"), ("b/index.md", "# B"), ("c.md", "# C")]:
+            with open(os.path.join(self.content, name), "w") as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for discovery returning pages in a stable, sorted order
+    def test_discover_pages(self):
+        pages = discover_pages(self.content, self.public)
+        self.assertEqual(
+            [os.path.relpath(str(dest), self.public) for _, dest in pages],
+            ["a.html", os.path.join("b", "index.html"), "c.html"],
+        )
+
+    # Test case for every page being rendered by the pool
+    def test_generates_all_pages(self):
+        generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        with open(os.path.join(self.public, "b", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>B</title><div><h1>B</h1></div>")
+
+    # Test case for failures being collected while the other pages still build
+    def test_failures_are_aggregated(self):
+        for name in ["a.md", "c.md"]:
+            with open(os.path.join(self.content, name), "w") as f:
+                f.write("no title")
+        with self.assertRaises(PageBuildError) as cm:
+            generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        self.assertEqual(
+            [from_path for from_path, _ in cm.exception.failures],
+            [os.path.join(self.content, "a.md"), os.path.join(self.content, "c.md")],
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.public, "b", "index.html")))
+
+    # Test case for pages rendered in worker processes reporting their links to the index
+    def test_link_index(self):
+        with open(os.path.join(self.content, "a.md"), "w") as f:
+            f.write("# A\n\n[b](/b/) and ![pic](/pic.png)")
+        index = set_link_index(LinkIndex(os.path.join(self.tmp.name, "links.json"), self.public))
+        try:
+            generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        finally:
+            set_link_index(None)
+        self.assertEqual(index.pages["/a.html"], (["/b/"], ["/pic.png"]))
+        self.assertEqual(index.pages["/c.html"], ([], []))
+
+    # Test case for worker processes rendering with the fingerprinted asset URLs
+    def test_fingerprinted_urls(self):
+        with open(os.path.join(self.content, "a.md"), "w") as f:
+            f.write("# A\n\n![pic](/pic.png)")
+        set_asset_urls({"/pic.png": "/pic.0123456789.png"})
+        try:
+            generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        finally:
+            set_asset_urls({})
+        with open(os.path.join(self.public, "a.html")) as f:
+            self.assertIn('<img src="/pic.0123456789.png" alt="pic"></img>', f.read())
+
 # Main block to execute the test cases
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode#Imports all necessary classes and modules
 
@@ -22,6 +23,22 @@ class TestHTMLNode(unittest.TestCase):
         )
         # Asserts that the props_to_html method generates the correct HTML attributes for the node.
 
+    def test_props_are_escaped(self):
+        # Tests that quotes, ampersands and angle brackets in attribute values are escaped.
+        node = LeafNode("a", "link", {"href": '/search?q="x"&y=<z>', "title": "it's"})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/search?q=&quot;x&quot;&amp;y=&lt;z&gt;" title="it&#x27;s">link</a>',
+        )
+
+    def test_props_cached_and_unhashable(self):
+        # Tests that repeated props reuse one rendered string and unhashable values still render.
+        first = LeafNode("a", "x", {"href": "/same"}).props_to_html()
+        self.assertIs(LeafNode("a", "y", {"href": "/same"}).props_to_html(), first)
+        node = HTMLNode("div", None, None, {"data-list": [1, 2]})
+        self.assertEqual(node.props_to_html(), ' data-list="[1, 2]"')
+        self.assertEqual(HTMLNode("div", None, None, {}).props_to_html(), "")
+
     def test_values(self):
         # Tests the basic attributes of the HTMLNode class.
         node = HTMLNode(
@@ -135,6 +152,95 @@ class TestHTMLNode(unittest.TestCase):
         )
 
 
+    def test_iter_html_chunks(self):
+        # Test case for the streamed chunks of a nested tree.
+        # Joining the chunks must give exactly the same output as to_html.
+        node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]), LeafNode("i", "x")],
+            {"class": "c"},
+        )
+        self.assertEqual(
+            list(node.iter_html()),
+            ['<div class="c">', "<p>", "<b>Bold</b>", " text", "</p>", "<i>x</i>", "</div>"],
+        )
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_write_html(self):
+        # Test case for writing a tree to a stream in small batches.
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(100)])
+        stream = io.StringIO()
+        node.write_html(stream, buffer_size=16)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
+    def test_deep_tree(self):
+        # Test case for a tree deeper than the recursion limit.
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertTrue(html.endswith("</span></span>"))
+
+    def test_empty_children(self):
+        # Test case for a ParentNode with an empty list of children.
+        self.assertEqual(ParentNode("div", []).to_html(), "<div></div>")
+
+    def test_to_html_errors(self):
+        # Test case for invalid nodes raising while streaming.
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "x").to_html()
+        with self.assertRaises(ValueError):
+            ParentNode("div", [LeafNode("b", None)]).to_html()
+        with self.assertRaises(ValueError):
+            ParentNode(None, []).to_html()
+
+    def test_minified_html(self):
+        # Test case for whitespace collapsing outside pre and code, leaving attributes alone.
+        node = ParentNode(
+            "div",
+            [
+                ParentNode(
+                    "p",
+                    [LeafNode(None, "a \n  b"), LeafNode("code", "x  y"), LeafNode("a", "l  k", {"title": "t  t"})],
+                ),
+                ParentNode("pre", [ParentNode("code", [LeafNode(None, "keep\n  this")])]),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div><p>a b<code>x  y</code><a title="t  t">l k</a></p><pre><code>keep\n  this</code></pre></div>',
+        )
+        stream = io.StringIO()
+        node.write_html(stream, minify=True)
+        self.assertEqual(stream.getvalue(), node.to_html(minify=True))
+
+    def test_omit_end_tags(self):
+        # Test case for leaving out the </p> and </li> end tags a parser infers.
+        items = ParentNode("ul", [ParentNode("li", [LeafNode(None, "a")]), ParentNode("li", [LeafNode(None, "b")])])
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "before list")]),
+                items,
+                ParentNode("p", [LeafNode(None, "before text")]),
+                LeafNode(None, "text"),
+                ParentNode("p", [LeafNode(None, "last")]),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(minify=True, omit_end_tags=True),
+            "<div><p>before list<ul><li>a<li>b</ul><p>before text</p>text<p>last</div>",
+        )
+        # The end of an <a> doesn't close a paragraph, and a root element keeps its end tag
+        self.assertEqual(
+            ParentNode("a", [ParentNode("p", [LeafNode(None, "x")])]).to_html(minify=True, omit_end_tags=True),
+            "<a><p>x</p></a>",
+        )
+        self.assertEqual(ParentNode("p", [LeafNode(None, "x")]).to_html(minify=True, omit_end_tags=True), "<p>x</p>")
+        # Without minify nothing changes
+        self.assertEqual(node.to_html(omit_end_tags=True), node.to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 # Importing functions and classes for handling inline markdown parsing.
@@ -6,6 +7,7 @@ from inline_markdown import (
     split_nodes_image,      # Function to process and extract image nodes from text
     split_nodes_link,       # Function to process and extract link nodes from text
     text_to_textnodes,      # Function to convert a text string into a list of text nodes based on markdown syntax
+    text_to_textnodes_multipass,  # Reference multi-pass implementation of text_to_textnodes
     extract_markdown_images, # Function to extract image information from markdown text
     extract_markdown_links  # Function to extract link information from markdown text
 )
@@ -188,6 +190,30 @@ class TestInlineMarkdownSplitLinks(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_many_links(self):
+        # Test a link-dense paragraph like a generated index page.
+        text = " | ".join(f"[page {i}](/page/{i})" for i in range(500))
+        new_nodes = split_nodes_link([TextNode(text, text_type_text)])
+        self.assertEqual(len(new_nodes), 999)
+        self.assertEqual(new_nodes[0], TextNode("page 0", text_type_link, "/page/0"))
+        self.assertEqual(new_nodes[1], TextNode(" | ", text_type_text))
+        self.assertEqual(new_nodes[-1], TextNode("page 499", text_type_link, "/page/499"))
+
+    def test_split_links_skips_images_and_other_nodes(self):
+        # Test that images and already formatted nodes are left untouched.
+        nodes = [
+            TextNode("![image](a.png) then [link](b)", text_type_text),
+            TextNode("[not split](c)", text_type_code),
+        ]
+        self.assertListEqual(
+            [
+                TextNode("![image](a.png) then ", text_type_text),
+                TextNode("link", text_type_link, "b"),
+                TextNode("[not split](c)", text_type_code),
+            ],
+            split_nodes_link(nodes),
+        )
+
 class TestInlineMarkdownSplitImages(unittest.TestCase):
     # Tests the function split_nodes_image to ensure it correctly splits text nodes containing markdown images.
 
@@ -265,5 +291,61 @@ class TestInlineMarkdownTextToTextNodes(unittest.TestCase):
         )
 
 
+# Helper returning the nodes for text, or the error message if parsing raised ValueError
+def parse_or_error(parse, text):
+    try:
+        return parse(text)
+    except ValueError as e:
+        return str(e)
+
+
+class TestTextToTextNodesCompatibility(unittest.TestCase):
+    # Checks that the single-pass scanner matches the original multi-pass pipeline exactly.
+
+    cases = [
+        "",
+        "plain text",
+        "**bold** and *italic* and `code`",
+        "***",
+        "****",
+        "**a***b*",
+        "**bold with *stars* and `ticks` inside**",
+        "*italic with `ticks` inside*",
+        "a``b",
+        "`code with *star*`",
+        "`code with **bold**`",
+        "*unclosed",
+        "**unclosed",
+        "`unclosed",
+        "*a **b** c*",
+        "![image](https://i.imgur.com/zjjcJKZ.png) and [link](https://boot.dev)",
+        "![x](y)[a](b)!![c](d)",
+        "[a ![b](c)",
+        "**[bold link](url)** and [*italic link*](url)",
+        "[link with `code`](url) and `[not a link](url)`",
+    ]
+
+    def test_known_cases(self):
+        # Test hand-picked inputs covering nesting, empty sections and errors.
+        for text in self.cases:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    parse_or_error(text_to_textnodes, text),
+                    parse_or_error(text_to_textnodes_multipass, text),
+                )
+
+    def test_random_cases(self):
+        # Test randomly assembled inputs built from markdown fragments.
+        fragments = ["a", " ", "*", "**", "`", "!", "[", "]", "(", ")", "[x](y)", "![i](u)"]
+        rng = random.Random(1234)
+        for _ in range(2000):
+            text = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 12)))
+            with self.subTest(text=text):
+                self.assertEqual(
+                    parse_or_error(text_to_textnodes, text),
+                    parse_or_error(text_to_textnodes_multipass, text),
+                )
+
+
 if __name__ == "__main__":
     unittest.main()
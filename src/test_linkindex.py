@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+
+from linkindex import LinkIndex, resolve_url, url_exists
+from markdown_blocks import HTMLBuffer, markdown_to_html
+
+
+class TestResolveUrl(unittest.TestCase):
+    # Test case for absolute, relative and external URLs
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("/majesty", "/index.html"), "/majesty")
+        self.assertEqual(resolve_url("/blog/#top", "/index.html"), "/blog/")
+        self.assertEqual(resolve_url("../img/a.png?v=2", "/blog/post/index.html"), "/blog/img/a.png")
+        self.assertEqual(resolve_url("other.html", "/blog/index.html"), "/blog/other.html")
+        for url in ["https://boot.dev", "//cdn.example.com/x.js", "mailto:a@b.c", "#section"]:
+            with self.subTest(url=url):
+                self.assertIsNone(resolve_url(url, "/index.html"))
+
+    # Test case for directory, extensionless and file targets
+    def test_url_exists(self):
+        outputs = {"/index.html", "/majesty/index.html", "/about.html", "/index.css"}
+        for url in ["/", "/majesty", "/majesty/", "/about", "/index.css"]:
+            with self.subTest(url=url):
+                self.assertTrue(url_exists(url, outputs))
+        for url in ["/missing", "/about/", "/index.js"]:
+            with self.subTest(url=url):
+                self.assertFalse(url_exists(url, outputs))
+
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.path = os.path.join(self.tmp.name, "links.json")
+        self.index = LinkIndex(self.path, self.public)
+        self.index.record(os.path.join(self.public, "index.html"), ["/majesty", "/gone"], ["/images/a.png"])
+        self.index.record(
+            os.path.join(self.public, "majesty", "index.html"), ["/", "https://x.com"], ["/images/a.png", "b.png"]
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for the index surviving a save and load in its compact form
+    def test_save_and_load(self):
+        self.index.save()
+        loaded = LinkIndex.load(self.path, self.public)
+        self.assertEqual(loaded.pages, self.index.pages)
+        with open(self.path) as f:
+            self.assertEqual(f.read().count("/images/a.png"), 1)
+
+    # Test case for the reverse index from targets to the pages referencing them
+    def test_referencing_pages(self):
+        targets = self.index.referencing_pages()
+        self.assertEqual(targets["/images/a.png"], ["/index.html", "/majesty/index.html"])
+        self.assertEqual(targets["/majesty/b.png"], ["/majesty/index.html"])
+        self.assertNotIn("https://x.com", targets)
+
+    # Test case for broken links and missing images being found
+    def test_find_broken(self):
+        outputs = {"/index.html", "/majesty/index.html", "/images/a.png"}
+        self.assertEqual(
+            self.index.find_broken(outputs),
+            [("/index.html", "link", "/gone"), ("/majesty/index.html", "image", "b.png")],
+        )
+
+    # Test case for template references counting for every page, relative ones resolved per page
+    def test_shared_references(self):
+        shared = ["/favicon.ico", "theme.js", "https://cdn.example.com/x.js"]
+        targets = self.index.referencing_pages(shared)
+        self.assertEqual(targets["/favicon.ico"], ["/index.html", "/majesty/index.html"])
+        self.assertEqual(targets["/theme.js"], ["/index.html"])
+        self.assertEqual(targets["/majesty/theme.js"], ["/majesty/index.html"])
+        outputs = {"/index.html", "/majesty/index.html", "/images/a.png", "/majesty/b.png", "/favicon.ico", "/theme.js"}
+        self.assertEqual(
+            self.index.find_broken(outputs, shared),
+            [("/index.html", "link", "/gone"), ("/majesty/", "template", "theme.js")],
+        )
+
+    # Test case for a broken template reference being reported once, not once per page
+    def test_shared_references_reported_once(self):
+        for name in ["a", "b", "c"]:
+            self.index.record(os.path.join(self.public, "majesty", f"{name}.html"), [], [])
+        outputs = {"/index.html", "/majesty/index.html", "/images/a.png", "/majesty/b.png", "/gone"}
+        self.assertEqual(
+            self.index.find_broken(outputs, ["/favicon.ico", "theme.js"]),
+            [
+                ("*", "template", "/favicon.ico"),
+                ("/", "template", "theme.js"),
+                ("/majesty/", "template", "theme.js"),
+            ],
+        )
+
+    # Test case for deleted pages being dropped
+    def test_retain(self):
+        self.index.retain([os.path.join(self.public, "index.html")])
+        self.assertEqual(list(self.index.pages), ["/index.html"])
+
+
+class TestBufferReferences(unittest.TestCase):
+    # Test case for the fused renderer collecting links and images, including from cached blocks
+    def test_references(self):
+        class DictCache(dict):
+            def lookup(self, key):
+                return self.get(key)
+
+            def put(self, key, value, references):
+                self[key] = (value,) + references
+
+        markdown = "# T\n\n[a](/a) `[not](/code)`\n\n* ![i](/i.png)\n* [b](/b)"
+        cache = DictCache()
+        for _ in range(2):
+            buffer = HTMLBuffer()
+            markdown_to_html(markdown, cache, buffer)
+            self.assertEqual((buffer.links, buffer.images), (["/a", "/b"], ["/i.png"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
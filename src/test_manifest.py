@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import sync_static
+from gencontent import PageBuildError, generate_pages_recursive
+from manifest import BuildManifest
+from testutil import write_file
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        # Build a tiny site layout in a temporary directory
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        # Run one incremental build and return the manifest it saved
+        manifest = BuildManifest.load(self.manifest_path)
+        os.makedirs(self.public, exist_ok=True)
+        sync_static(self.static, self.public, manifest)
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.remove_stale(self.public)
+        manifest.save()
+        return manifest
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self.build()
+        index_path = os.path.join(self.public, "index.html")
+        os.utime(index_path, (0, 0))
+        self.build()
+        # The untouched page keeps its old mtime because it was skipped
+        self.assertEqual(os.path.getmtime(index_path), 0)
+
+    def test_changed_page_is_rebuilt(self):
+        self.build()
+        write_file(os.path.join(self.content, "index.md"), "# Changed")
+        self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Changed", f.read())
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        blog_path = os.path.join(self.public, "blog", "index.html")
+        os.utime(blog_path, (0, 0))
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        self.assertNotEqual(os.path.getmtime(blog_path), 0)
+
+    def test_partial_change_rebuilds_including_pages(self):
+        write_file(self.template, "{{> header.html }}{{ Content }}")
+        write_file(os.path.join(os.path.dirname(self.template), "header.html"), "<title>{{ Title }}</title>")
+        self.build()
+        index_path = os.path.join(self.public, "index.html")
+        os.utime(index_path, (0, 0))
+        write_file(os.path.join(os.path.dirname(self.template), "header.html"), "<h1>{{ Title }}</h1>")
+        os.utime(os.path.join(os.path.dirname(self.template), "header.html"), ns=(0, 1))
+        self.build()
+        with open(index_path) as f:
+            self.assertTrue(f.read().startswith("<h1>Home</h1>"))
+
+    def test_failed_write_is_retried(self):
+        self.build()
+        # A file where the blog directory should be makes the blog page's write fail
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog 2")
+        os.remove(os.path.join(self.public, "blog", "index.html"))
+        os.rmdir(os.path.join(self.public, "blog"))
+        write_file(os.path.join(self.public, "blog"), "in the way")
+        manifest = BuildManifest.load(self.manifest_path)
+        with self.assertRaises(PageBuildError) as cm:
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertEqual(cm.exception.failures[0][0], os.path.join(self.content, "blog", "index.md"))
+        self.assertNotIn(os.path.join(self.public, "blog", "index.html"), manifest.entries["pages"])
+        self.assertIn(os.path.join(self.public, "index.html"), manifest.entries["pages"])
+
+    def test_failed_render_is_collected_and_retried(self):
+        self.build()
+        # A page without a title fails to render without stopping the other pages
+        write_file(os.path.join(self.content, "blog", "index.md"), "no title here")
+        write_file(os.path.join(self.content, "index.md"), "# Home 2")
+        manifest = BuildManifest.load(self.manifest_path)
+        with self.assertRaises(PageBuildError) as cm:
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertEqual(
+            cm.exception.failures,
+            [(os.path.join(self.content, "blog", "index.md"), "ValueError: No title found")],
+        )
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Home 2", f.read())
+        self.assertNotIn(os.path.join(self.public, "blog", "index.html"), manifest.entries["pages"])
+        # The previous output stays in place until the page builds again
+        self.assertNotIn(os.path.join(self.public, "blog", "index.html"), manifest.remove_stale(self.public))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+    def test_stale_outputs_are_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
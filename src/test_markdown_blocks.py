@@ -1,7 +1,18 @@
+import glob
+import io
+import os
+import random
+import tempfile
 import unittest
+from corpus import CorpusOptions, generate_corpus
+from profiler import count_nodes
 from markdown_blocks import (
+    HTMLBuffer,
+    markdown_to_html,
+    lines_to_block_type,
     markdown_to_html_node,
     markdown_to_blocks,
+    scan_blocks,
     block_to_block_type,
     block_type_paragraph,
     block_type_code,
@@ -62,6 +73,29 @@ This is the same paragraph on a new line
                 "* This is a list\n* with items",
             ],
         )
+    def test_markdown_to_blocks_whitespace_lines(self):
+        # Test that lines holding only whitespace separate blocks, and whitespace around each block is stripped.
+        md = "# heading\n   \nstill a paragraph\n\t\n\n  * a\n* b  \n\n \n"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["# heading", "still a paragraph", "* a\n* b"],
+        )
+        self.assertEqual([block.text() for block in scan_blocks(md)], markdown_to_blocks(md))
+
+    def test_scan_blocks_offsets(self):
+        # Test that block records carry their type and offsets into the source.
+        md = "\n# title\n \n* one\n* two\n"
+        blocks = scan_blocks(md)
+        self.assertEqual([block.block_type for block in blocks], [block_type_heading, block_type_ulist])
+        self.assertEqual((blocks[1].start, blocks[1].end), (11, 22))
+        self.assertEqual(blocks[1].lines(), ["* one", "* two"])
+        self.assertEqual(blocks[1].text(), "* one\n* two")
+
+    def test_scan_blocks_empty(self):
+        # Test documents without any blocks.
+        self.assertEqual(scan_blocks(""), [])
+        self.assertEqual(scan_blocks(" \n\t\n"), [])
+
 class TestBlockToBlock(unittest.TestCase):
     def test_block_to_block_types(self):
         # Test if the function correctly identifies a heading block.
@@ -88,6 +122,28 @@ class TestBlockToBlock(unittest.TestCase):
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), block_type_paragraph)
 
+    def test_near_misses(self):
+        # Test blocks that look like another type but are paragraphs.
+        for block in ["####### seven", "#no space", "```\ncode", "> quote\nnot quote", "* a\n- b",
+                      "**bold**", "1. one\n3. three", "1.no space", "-dash", ""]:
+            with self.subTest(block=block):
+                self.assertEqual(block_to_block_type(block), block_type_paragraph)
+
+    def test_long_ordered_list(self):
+        # Test numbering past the precomputed markers.
+        block = "\n".join(f"{i}. item" for i in range(1, 150))
+        self.assertEqual(block_to_block_type(block), block_type_olist)
+        self.assertEqual(block_to_block_type(block.replace("120. ", "121. ")), block_type_paragraph)
+
+    def test_matches_reference_classifier(self):
+        # Test randomly assembled blocks against the original chain of startswith checks.
+        fragments = ["#", "# ", "```", ">", "* ", "- ", "1. ", "2. ", "3. ", "10. ", "a", " ", "\n"]
+        rng = random.Random(4321)
+        for _ in range(3000):
+            block = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 10)))
+            with self.subTest(block=block):
+                self.assertEqual(block_to_block_type(block), lines_to_block_type(block.split("\n")))
+
 class TestMarkdownToHtml(unittest.TestCase):
     # Test case for a single paragraph with bolded text.
     def test_paragraph(self):
@@ -207,6 +263,99 @@ this is paragraph text
         )
 
 
+class TestFusedRenderPath(unittest.TestCase):
+    # Checks that markdown_to_html matches the node tree path byte for byte.
+
+    def assert_same_output(self, markdown):
+        buffer = HTMLBuffer()
+        node = markdown_to_html_node(markdown)
+        self.assertEqual(markdown_to_html(markdown, None, buffer), node.to_html())
+        self.assertEqual(buffer.nodes, count_nodes(node))
+        # Minifying while rendering matches the minifying serializer
+        for omit_end_tags in [False, True]:
+            buffer = HTMLBuffer(minify=True, omit_end_tags=omit_end_tags)
+            self.assertEqual(markdown_to_html(markdown, None, buffer), node.to_html(True, omit_end_tags))
+
+    def test_site_content(self):
+        # Test every page of the site's own content directory.
+        content = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+        for path in glob.glob(os.path.join(content, "**", "*.md"), recursive=True):
+            with self.subTest(path=path):
+                with open(path) as f:
+                    self.assert_same_output(f.read())
+
+    def test_synthetic_corpus(self):
+        # Test a generated corpus mixing every block and inline type.
+        options = CorpusOptions(pages=40, list_density=0.2, code_density=0.1, quote_density=0.1, link_density=0.1)
+        with tempfile.TemporaryDirectory() as root:
+            for path in generate_corpus(root, options):
+                with open(path) as f:
+                    self.assert_same_output(f.read())
+
+    def test_edge_cases(self):
+        # Test empty documents, nested markup and every block type with inline markup.
+        for markdown in ["", "#### h4 with `code`", "```\ncode **not bold**\n```", "> a\n>> *b*",
+                         "- [link](/x)\n- ![img](/y.png)", "1. **a**\n2. b", "para\nwith *lines*",
+                         '[quoted](/a"b&c) ![alt "x"](/i.png?a=1&b=2)']:
+            with self.subTest(markdown=markdown):
+                self.assert_same_output(markdown)
+
+    def test_errors_match(self):
+        # Test that invalid markdown raises the same error on both paths.
+        for markdown in ["unclosed **bold", "```\ncode\n```x"]:
+            with self.subTest(markdown=markdown):
+                with self.assertRaises(ValueError) as tree_error:
+                    markdown_to_html_node(markdown)
+                with self.assertRaises(ValueError) as fused_error:
+                    markdown_to_html(markdown)
+                self.assertEqual(str(fused_error.exception), str(tree_error.exception))
+
+    def test_cache(self):
+        # Test that both paths store and reuse the same HTML in a block cache.
+        class DictCache(dict):
+            def get(self, key):
+                entry = self.lookup(key)
+                return None if entry is None else entry[0]
+
+            def lookup(self, key):
+                return dict.get(self, key)
+
+            def put(self, key, value, references=None):
+                self[key] = (value,) + (references or (None, None))
+
+        markdown = "# Title\n\nSome *text* [a](/a)\n\n* a\n* ![b](/b.png) `[c](/c)`"
+        fused_cache = DictCache()
+        tree_cache = DictCache()
+        self.assertEqual(markdown_to_html(markdown, fused_cache), markdown_to_html_node(markdown, tree_cache).to_html())
+        self.assertEqual({key: entry[0] for key, entry in fused_cache.items()}, {key: entry[0] for key, entry in tree_cache.items()})
+        # Hits take the links and images from the cache entry, in rendering order
+        buffer = HTMLBuffer()
+        self.assertEqual(markdown_to_html(markdown, fused_cache, buffer), markdown_to_html_node(markdown).to_html())
+        self.assertEqual((buffer.nodes, buffer.links, buffer.images), (4, ["/a"], ["/b.png"]))
+        # Entries without recorded references are rendered again to collect them
+        buffer = HTMLBuffer()
+        markdown_to_html(markdown, tree_cache, buffer)
+        self.assertEqual((buffer.links, buffer.images), (["/a"], ["/b.png"]))
+
+    def test_write_html(self):
+        # Test that a buffer streams the same HTML it joins, in batches of the given size.
+        buffer = HTMLBuffer()
+        markdown = "\n\n".join(f"para *{i}*" for i in range(50))
+        html = markdown_to_html(markdown, None, buffer)
+        stream = io.StringIO()
+        buffer.write_html(stream, buffer_size=64)
+        self.assertEqual(stream.getvalue(), html)
+
+    def test_minify(self):
+        # Test whitespace collapsing outside code blocks and code spans, and end tag omission.
+        markdown = "a  b\tc `x  y`\n\n```\nkeep   this\n```\n\n* one  two\n* three"
+        buffer = HTMLBuffer(minify=True, omit_end_tags=True)
+        self.assertEqual(
+            markdown_to_html(markdown, None, buffer),
+            "<div><p>a b c <code>x  y</code><pre><code>keep   this\n</code></pre><ul><li>one two<li>three</ul></div>",
+        )
+
+
 if __name__ == "__main__":
     # If this script is run directly, execute the test cases.
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+from outputwriter import OutputWriter, write_output, write_stream
+
+
+class TestWriteOutput(unittest.TestCase):
+    # Test case for a new file being written without leaving temporary files behind
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            self.assertTrue(write_output(path, b"<p>hi</p>"))
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"<p>hi</p>")
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+    # Test case for identical content leaving the file and its mtime untouched
+    def test_identical_write_is_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            write_output(path, b"same")
+            os.utime(path, (0, 0))
+            self.assertFalse(write_output(path, b"same"))
+            self.assertEqual(os.path.getmtime(path), 0)
+            self.assertTrue(write_output(path, b"diff"))
+            self.assertNotEqual(os.path.getmtime(path), 0)
+
+
+# Helper returning a function that streams the given chunks into a file-like object
+def chunks_writer(*chunks):
+    def produce(stream):
+        for chunk in chunks:
+            stream.write(chunk)
+
+    return produce
+
+
+class TestWriteStream(unittest.TestCase):
+    # Test case for streamed text replacing the file only when it differs anywhere
+    def test_write_stream(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            self.assertTrue(write_stream(path, chunks_writer("<p>", "héllo", "</p>")))
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), "<p>héllo</p>".encode())
+            os.utime(path, (0, 0))
+            self.assertFalse(write_stream(path, chunks_writer("<p>hé", "llo</p>")))
+            self.assertEqual(os.path.getmtime(path), 0)
+            # A change after a matching prefix, a shorter text and a longer one all rewrite the file
+            for chunks in [("<p>", "héllo", "</b>"), ("<p>", "hé"), ("<p>", "hé", "llo there")]:
+                with self.subTest(chunks=chunks):
+                    self.assertTrue(write_stream(path, chunks_writer(*chunks)))
+                    with open(path, "rb") as f:
+                        self.assertEqual(f.read(), "".join(chunks).encode())
+            self.assertTrue(write_stream(os.path.join(tmp, "empty.html"), chunks_writer()))
+            self.assertEqual(sorted(os.listdir(tmp)), ["empty.html", "index.html"])
+
+    # Test case for a failing producer leaving the existing file and no temporary file behind
+    def test_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            write_output(path, b"old")
+
+            def produce(stream):
+                stream.write("new")
+                raise ValueError("broken page")
+
+            with self.assertRaises(ValueError):
+                write_stream(path, produce)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"old")
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+
+class TestOutputWriter(unittest.TestCase):
+    # Test case for queued writes landing in nested directories, with counts of skipped writes
+    def test_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_output(os.path.join(tmp, "0.html"), b"page 0")
+            with OutputWriter(workers=3, max_pending=2) as writer:
+                for index in range(20):
+                    writer.submit(os.path.join(tmp, str(index % 4), "..", f"{index}.html"), f"page {index}".encode())
+                    writer.submit(os.path.join(tmp, str(index % 4), f"{index}.html"), f"page {index}".encode())
+            self.assertEqual((writer.written, writer.unchanged, writer.errors), (39, 1, []))
+            with open(os.path.join(tmp, "3", "7.html"), "rb") as f:
+                self.assertEqual(f.read(), b"page 7")
+
+    # Test case for failed writes being collected instead of raised from a thread
+    def test_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            blocker = os.path.join(tmp, "blocker")
+            write_output(blocker, b"a file, not a directory")
+            writer = OutputWriter(workers=1)
+            writer.submit(os.path.join(blocker, "index.html"), b"x")
+            writer.submit(os.path.join(tmp, "ok.html"), b"x")
+            errors = writer.close()
+            self.assertEqual([path for path, _ in errors], [os.path.join(blocker, "index.html")])
+            self.assertTrue(os.path.exists(os.path.join(tmp, "ok.html")))
+
+    # Test case for streamed outputs being written by the writer threads
+    def test_streamed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with OutputWriter(workers=2) as writer:
+                writer.submit(os.path.join(tmp, "a", "index.html"), chunks_writer("<p>", "a", "</p>"))
+            self.assertEqual((writer.written, writer.errors), (1, []))
+            with open(os.path.join(tmp, "a", "index.html"), "rb") as f:
+                self.assertEqual(f.read(), b"<p>a</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import gzip
+import os
+import tempfile
+import unittest
+import zlib
+
+from manifest import BuildManifest
+from precompress import gzip_bytes, precompress_outputs, remove_precompressed, remove_stale_variants, variant_suffixes
+from testutil import write_file
+
+
+class TestPrecompressOutputs(unittest.TestCase):
+    def setUp(self):
+        # Lay out a public tree with large and small text outputs and an image
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.cache_path = os.path.join(self.tmp.name, "cache.json")
+        self.page = os.path.join(self.public, "index.html")
+        self.css = os.path.join(self.public, "css", "index.css")
+        write_file(self.page, "<p>page</p>" * 200)
+        write_file(self.css, "body { color: red }\n" * 100)
+        write_file(os.path.join(self.public, "small.html"), "<p>x</p>")
+        write_file(os.path.join(self.public, "image.png"), "png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for variants being written for large text outputs only
+    def test_compresses_text_outputs(self):
+        self.assertEqual(precompress_outputs(self.public, self.cache_path), (2, 0))
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), ("<p>page</p>" * 200).encode())
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "image.png.gz")))
+
+    # Test case for gzip output not depending on when it was made
+    def test_reproducible(self):
+        self.assertEqual(gzip_bytes(b"data" * 100, 9), gzip_bytes(b"data" * 100, 9))
+
+    # Test case for unchanged outputs being skipped, even when rewritten with the same content
+    def test_unchanged_outputs_skipped(self):
+        precompress_outputs(self.public, self.cache_path)
+        self.assertEqual(precompress_outputs(self.public, self.cache_path), (0, 2))
+        write_file(self.page, "<p>page</p>" * 200)
+        os.utime(self.page, ns=(0, 0))
+        self.assertEqual(precompress_outputs(self.public, self.cache_path), (0, 2))
+        write_file(self.page, "<p>new</p>" * 200)
+        self.assertEqual(precompress_outputs(self.public, self.cache_path), (1, 1))
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), ("<p>new</p>" * 200).encode())
+
+    # Test case for variants of deleted or shrunk outputs and of dropped formats being removed
+    def test_stale_variants_removed(self):
+        precompress_outputs(self.public, self.cache_path)
+        os.remove(self.page)
+        write_file(self.css, "body {}")
+        precompress_outputs(self.public, self.cache_path)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        write_file(self.css, "body { color: red }\n" * 100)
+        precompress_outputs(self.public, self.cache_path)
+        self.assertEqual(precompress_outputs(self.public, self.cache_path, ["deflate"]), (1, 0))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        with open(self.css + ".zz", "rb") as f:
+            self.assertEqual(zlib.decompress(f.read()), ("body { color: red }\n" * 100).encode())
+
+    # Test case for limiting the pass to the given outputs
+    def test_paths(self):
+        self.assertEqual(precompress_outputs(self.public, self.cache_path, paths=[self.css]), (1, 0))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    # Test case for turning precompression off removing every variant it wrote
+    def test_remove_precompressed(self):
+        precompress_outputs(self.public, self.cache_path)
+        self.assertEqual(remove_precompressed(self.public, self.cache_path), 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        self.assertFalse(os.path.exists(self.cache_path))
+        self.assertEqual(remove_precompressed(self.public, self.cache_path), 0)
+
+    # Test case for variants found in the output tree, whatever wrote them, being removed once
+    # their output is gone or newer, while current ones and unrelated compressed files stay
+    def test_remove_stale_variants(self):
+        precompress_outputs(self.public, self.cache_path)
+        os.remove(self.cache_path)
+        orphan = os.path.join(self.public, "gone", "index.html.zz")
+        archive = os.path.join(self.public, "files", "site.tar.gz")
+        write_file(orphan, "x")
+        write_file(archive, "x")
+        os.utime(self.page + ".gz", ns=(0, 0))
+        self.assertEqual(remove_stale_variants(self.public, [self.css]), 0)
+        self.assertEqual(remove_stale_variants(self.public), 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+        self.assertTrue(os.path.exists(archive))
+
+    # Test case for removing a stale output taking its variants along and pruning their directory
+    def test_manifest_removes_variants(self):
+        page = os.path.join(self.public, "blog", "index.html")
+        write_file(page, "<p>post</p>" * 200)
+        precompress_outputs(self.public, self.cache_path)
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        manifest.record("pages", page, {})
+        manifest = BuildManifest(manifest.path, manifest.entries)
+        os.remove(page)
+        self.assertEqual(manifest.remove_stale(self.public, variant_suffixes), [page])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    # Test case for an unknown format being rejected
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            precompress_outputs(self.public, self.cache_path, ["br"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_page
+from htmlnode import LeafNode, ParentNode
+from profiler import BuildProfiler, add_build_hook, count_nodes, remove_build_hook, stage
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = BuildProfiler()
+        add_build_hook(self.profiler)
+
+    def tearDown(self):
+        remove_build_hook(self.profiler)
+
+    # Test case for stage timings being reported to hooks
+    def test_stage_event(self):
+        with stage("copy static"):
+            pass
+        self.assertEqual([event["name"] for event in self.profiler.stages], ["copy static"])
+        self.assertGreaterEqual(self.profiler.stages[0]["wall"], 0)
+
+    # Test case for page events carrying node and byte counts
+    def test_page_event(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            from_path = os.path.join(tmp, "index.md")
+            template_path = os.path.join(tmp, "template.html")
+            with open(from_path, "w") as f:
+                f.write("# Title\n\nSome **bold** text")
+            with open(template_path, "w") as f:
+                f.write("{{ Content }}")
+            generate_page(from_path, template_path, os.path.join(tmp, "index.html"))
+        page = self.profiler.pages[0]
+        self.assertEqual(page["path"], from_path)
+        self.assertEqual(page["nodes"], 7)
+        self.assertEqual(page["bytes_read"], 27)
+        self.assertEqual(page["bytes_written"], len("<div><h1>Title</h1><p>Some <b>bold</b> text</p></div>"))
+        self.assertIn(from_path, self.profiler.report())
+
+    # Test case for the JSON and Chrome trace formats
+    def test_traces(self):
+        with stage("generate pages"):
+            pass
+        trace = self.profiler.to_json()
+        self.assertEqual(trace["stages"][0]["name"], "generate pages")
+        self.assertEqual(trace["totals"]["pages"], 0)
+        chrome = self.profiler.to_chrome_trace()
+        self.assertEqual(chrome["traceEvents"][0]["ph"], "X")
+        self.assertEqual(chrome["traceEvents"][0]["cat"], "stage")
+
+
+class TestCountNodes(unittest.TestCase):
+    # Test case for counting every node in a tree
+    def test_count_nodes(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "c")])])
+        self.assertEqual(count_nodes(node), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from gencontent import discover_pages, generate_pages_recursive
+from sharding import (
+    parse_shard,
+    shard_of,
+    shard_manifest_path,
+    verify_shards,
+    write_shard_manifest,
+)
+from testutil import write_file
+
+
+class TestShardPartition(unittest.TestCase):
+    # Test case for parsing valid and invalid --shard values
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ["0/4", "5/4", "1/0", "a/b", "3"]:
+            with self.subTest(text=text):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    parse_shard(text)
+
+    # Test case for the partition being stable, in range and spread over every shard
+    def test_shard_of(self):
+        paths = [f"section{i % 7}/page{i}.md" for i in range(400)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual(shard_of(os.path.join("a", "b.md"), 4), shard_of("a/b.md", 4))
+
+
+class TestShardedBuild(unittest.TestCase):
+    def setUp(self):
+        # Build a site with enough pages to land in every shard
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        write_file(self.template, "<title>{{ Title }}</title>")
+        for i in range(12):
+            write_file(os.path.join(self.content, f"dir{i % 3}", f"page{i}.md"), f"# Page {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_shards(self, count):
+        # Build every shard into the shared public directory and write its manifest
+        for index in range(1, count + 1):
+            shard = (index, count)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.public, shard=shard)
+            pages = discover_pages(self.content, self.public, shard)
+            write_shard_manifest(self.public, shard, [dest for _, dest in pages])
+
+    def expected(self):
+        return [dest for _, dest in discover_pages(self.content, self.public)]
+
+    # Test case for the shards splitting the pages into disjoint sets covering every page
+    def test_shards_partition_pages(self):
+        shards = [discover_pages(self.content, self.public, (i, 3)) for i in range(1, 4)]
+        self.assertEqual(sorted(page for pages in shards for page in pages), sorted(discover_pages(self.content, self.public)))
+
+    # Test case for a complete merge verifying cleanly
+    def test_verify_complete(self):
+        self.build_shards(3)
+        self.assertEqual(verify_shards(self.public, self.expected()), [])
+
+    # Test case for a missing shard and a duplicated output being reported
+    def test_verify_problems(self):
+        self.build_shards(3)
+        os.remove(shard_manifest_path(self.public, (3, 3)))
+        # Shard 1 claims every page, so pages of shard 2 are produced twice
+        write_shard_manifest(self.public, (1, 3), self.expected())
+        problems = verify_shards(self.public, self.expected())
+        self.assertIn("missing manifest for shard 3/3", problems)
+        self.assertTrue(any(problem.endswith("produced by shards 1, 2") for problem in problems))
+
+    # Test case for outputs lost or changed after the shards wrote them
+    def test_verify_changed_and_missing_outputs(self):
+        self.build_shards(3)
+        changed, removed = self.expected()[:2]
+        with open(changed, "a") as f:
+            f.write("changed")
+        os.remove(removed)
+        problems = verify_shards(self.public, self.expected())
+        self.assertEqual(len(problems), 2)
+        self.assertIn("differs from what shard", problems[0] + problems[1])
+        self.assertIn("missing from the merged tree", problems[0] + problems[1])
+
+    # Test case for the output of deleted content, which no shard removes, being reported
+    def test_verify_stale_pages(self):
+        self.build_shards(2)
+        os.remove(os.path.join(self.content, "dir0", "page0.md"))
+        for name in os.listdir(os.path.join(self.public, ".shards")):
+            os.remove(os.path.join(self.public, ".shards", name))
+        self.build_shards(2)
+        self.assertEqual(verify_shards(self.public, self.expected()), ["dir0/page0.html: stale page not produced by any shard"])
+
+    # Test case for manifests from builds with different shard counts
+    def test_verify_mixed_counts(self):
+        self.build_shards(2)
+        write_shard_manifest(self.public, (1, 3), [])
+        self.assertEqual(
+            verify_shards(self.public, self.expected()),
+            ["shard manifests disagree on the number of shards: [2, 3]"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
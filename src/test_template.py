@@ -0,0 +1,131 @@
+import io
+import os
+import tempfile
+import unittest
+
+from fingerprint import set_asset_urls
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template, minify_source
+
+
+class TestTemplate(unittest.TestCase):
+    # Test case for splitting a template into segments and slots
+    def test_compile(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    # Test case for rendering matching the old str.replace output
+    def test_render(self):
+        template = Template("<title> {{ Title }} </title> {{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title> Hi </title> <p>x</p>",
+        )
+
+    # Test case for repeated and unknown placeholders
+    def test_render_repeated_and_unknown(self):
+        template = Template("{{ Title }}|{{Title}}|{{ Other }}")
+        self.assertEqual(template.render({"Title": "T"}), "T|T|{{ Other }}")
+
+    # Test case for a template without placeholders
+    def test_minify_source(self):
+        # Test case for comments dropped, whitespace collapsed and dropped next to block tags
+        source = (
+            "<!DOCTYPE html>\n<html>\n  <head> <title> {{ Title }} </title> </head>\n  <!-- note -->\n"
+            "  <body>\n    <p>a  <b>b</b>\n  c <!-- x --> d</p>\n  </body>\n</html>\n"
+        )
+        self.assertEqual(
+            minify_source(source),
+            "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body><p>a <b>b</b> c d</p></body></html>",
+        )
+
+    def test_minify_source_verbatim(self):
+        # Test case for pre, script and style contents, comments included, being kept as written
+        source = "<div>\n<pre>  a\n  <!-- kept --> b </pre>\n<script>\n// line comment\nf()\n</script>\n</div>"
+        self.assertEqual(
+            minify_source(source),
+            "<div><pre>  a\n  <!-- kept --> b </pre><script>\n// line comment\nf()\n</script></div>",
+        )
+
+    def test_minified_template(self):
+        # Test case for a minified template serializing node values minified in the same pass
+        template = Template("<body>\n  {{ Content }}\n</body>", minify=True, omit_end_tags=True)
+        content = ParentNode("div", [ParentNode("p", [LeafNode(None, "a  b")])])
+        stream = io.StringIO()
+        template.write(stream, {"Content": content})
+        self.assertEqual(stream.getvalue(), "<body><div><p>a b</div></body>")
+
+    def test_no_slots(self):
+        self.assertEqual(Template("plain").render({}), "plain")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    # Test case for templates being cached by path and reloaded when they change
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(0, 1))
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<h1>x</h1>")
+
+    # Test case for partials being inlined relative to the including file and tracked as dependencies
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            partials = os.path.join(tmp, "partials")
+            os.makedirs(partials)
+            with open(path, "w") as f:
+                f.write("{{> partials/head.html }}<body>{{ Content }}</body>")
+            with open(os.path.join(partials, "head.html"), "w") as f:
+                f.write("<title>{{ Title }}</title>{{>nav.html}}")
+            with open(os.path.join(partials, "nav.html"), "w") as f:
+                f.write("<nav></nav>")
+            template = load_template(path)
+            self.assertEqual(template.render({"Title": "T", "Content": "c"}), "<title>T</title><nav></nav><body>c</body>")
+            self.assertEqual(
+                template.dependencies,
+                [path, os.path.join(partials, "head.html"), os.path.join(partials, "nav.html")],
+            )
+            # Editing a partial invalidates the compiled template
+            with open(os.path.join(partials, "nav.html"), "w") as f:
+                f.write("<nav>x</nav>")
+            os.utime(os.path.join(partials, "nav.html"), ns=(0, 1))
+            self.assertIn("<nav>x</nav>", load_template(path).render({}))
+
+    # Test case for an include cycle being reported instead of recursing forever
+    def test_include_cycle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{> a.html }}")
+            with open(os.path.join(tmp, "a.html"), "w") as f:
+                f.write("{{> template.html }}")
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+    # Test case for asset URLs being fingerprinted, and recompiled when the fingerprints change
+    def test_fingerprinted_urls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write('<link href="/index.css">{{ Content }}')
+            try:
+                set_asset_urls({"/index.css": "/index.0123456789.css"})
+                template = load_template(path)
+                self.assertEqual(template.render({"Content": "c"}), '<link href="/index.0123456789.css">c')
+                self.assertEqual(template.references, ["/index.css"])
+                set_asset_urls({"/index.css": "/index.abcdef0123.css"})
+                self.assertIn("/index.abcdef0123.css", load_template(path).render({}))
+            finally:
+                set_asset_urls({})
+            self.assertIn('href="/index.css"', load_template(path).render({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
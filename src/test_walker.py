@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from walker import kind_asset, kind_dir, kind_page, walk_assets, walk_pages, walk_tree
+
+
+# Helper to create an empty file, creating parent directories as needed
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+class TestWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for path in ["b.md", "a/index.md", "a/z.md", "c/d/e.md"]:
+            touch(os.path.join(self.root, "content", path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test case for pages coming out in sorted depth-first order with .html destinations
+    def test_walk_pages(self):
+        content = os.path.join(self.root, "content")
+        items = list(walk_pages(content, "public"))
+        self.assertEqual(
+            [os.path.relpath(item.source, content) for item in items],
+            [os.path.join("a", "index.md"), os.path.join("a", "z.md"), "b.md", os.path.join("c", "d", "e.md")],
+        )
+        self.assertEqual(items[0].dest, os.path.join("public", "a", "index.html"))
+        self.assertTrue(all(item.kind == kind_page for item in items))
+
+    # Test case for directories being yielded before their contents
+    def test_walk_assets_dirs_first(self):
+        content = os.path.join(self.root, "content")
+        kinds = [(item.kind, os.path.relpath(item.source, content)) for item in walk_assets(content, "out")]
+        self.assertEqual(kinds[0], (kind_dir, "a"))
+        self.assertEqual(kinds[1], (kind_asset, os.path.join("a", "index.md")))
+        self.assertLess(kinds.index((kind_dir, "c")), kinds.index((kind_dir, os.path.join("c", "d"))))
+
+    # Test case for stat results coming from the directory entry
+    def test_stat(self):
+        item = next(walk_pages(os.path.join(self.root, "content"), "public"))
+        self.assertEqual(item.stat().st_size, 0)
+
+    # Test case for trees nested deeper than the recursion limit
+    def test_deep_tree(self):
+        depth = sys.getrecursionlimit() + 50
+        # os.makedirs is itself recursive, so build the chain one directory at a time
+        deep = os.path.join(self.root, "deep")
+        os.mkdir(deep)
+        for _ in range(depth):
+            deep = os.path.join(deep, "d")
+            os.mkdir(deep)
+        touch(os.path.join(deep, "leaf.md"))
+        pages = list(walk_pages(os.path.join(self.root, "deep"), "public"))
+        self.assertEqual(len(pages), 1)
+        self.assertTrue(pages[0].dest.endswith("leaf.html"))
+        # shutil.rmtree is recursive too, so tear the chain down before tearDown runs
+        os.remove(os.path.join(deep, "leaf.md"))
+        for _ in range(depth + 1):
+            os.rmdir(deep)
+            deep = os.path.dirname(deep)
+
+    # Test case for the walk being lazy
+    def test_lazy(self):
+        items = walk_tree(os.path.join(self.root, "content"), "public", kind_page)
+        self.assertEqual(next(items).kind, kind_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
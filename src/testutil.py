@@ -0,0 +1,8 @@
+import os
+
+
+# Helper to create a file with the given contents, creating parent directories as needed
+def write_file(path, contents):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(contents)
@@ -1,4 +1,4 @@
-from htmlnode import LeafNode
+from htmlnode import LeafNode, render_props
 
 # Constants representing different text types
 text_type_text = "text"        # Plain text
@@ -10,6 +10,8 @@ text_type_image = "image"      # Image text
 
 # Class representing a text node with associated metadata
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         # Initialize a TextNode with text, text type, and optional URL
         self.text = text
@@ -28,8 +30,15 @@ class TextNode:
         # Provide a string representation of the TextNode instance
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
+# Function to map a link or image URL to its fingerprinted form through asset_urls, if given
+# asset_urls maps original asset URLs to fingerprinted ones; other URLs are kept
+def map_asset_url(url, asset_urls):
+    if asset_urls:
+        return asset_urls.get(url, url)
+    return url
+
 # Function to convert a TextNode to an HTML node
-def text_node_to_html_node(text_node):
+def text_node_to_html_node(text_node, asset_urls=None):
     # Convert text node to corresponding HTML node based on text type
     if text_node.text_type == text_type_text:
         return LeafNode(None, text_node.text)  # Plain text
@@ -40,10 +49,32 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == text_type_code:
         return LeafNode("code", text_node.text)  # Code text
     if text_node.text_type == text_type_link:
-        # Link text with an href attribute
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        # Link text with an href attribute, pointing at the fingerprinted file for a static asset
+        return LeafNode("a", text_node.text, {"href": map_asset_url(text_node.url, asset_urls)})
     if text_node.text_type == text_type_image:
         # Image text with src and alt attributes
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return LeafNode("img", "", {"src": map_asset_url(text_node.url, asset_urls), "alt": text_node.text})
     # Raise an error if the text type is invalid
     raise ValueError(f"Invalid text type: {text_node.text_type}")
+
+# Tags wrapping the inline text types that render as a plain element
+inline_tags = {
+    text_type_bold: "b",
+    text_type_italic: "i",
+    text_type_code: "code",
+}
+
+# Function to render an inline span straight to the HTML its text_node_to_html_node node would produce
+# Used by the fused render path, which never builds the LeafNode
+def text_span_to_html(text, text_type, url=None, asset_urls=None):
+    if text_type == text_type_text:
+        return text  # Plain text
+    tag = inline_tags.get(text_type)
+    if tag is not None:
+        return f"<{tag}>{text}</{tag}>"
+    if text_type == text_type_link:
+        return f"<a{render_props((('href', map_asset_url(url, asset_urls)),))}>{text}</a>"
+    if text_type == text_type_image:
+        return f"<img{render_props((('src', map_asset_url(url, asset_urls)), ('alt', text)))}></img>"
+    # Raise an error if the text type is invalid
+    raise ValueError(f"Invalid text type: {text_type}")
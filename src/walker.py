@@ -0,0 +1,72 @@
+import os
+
+from sharding import in_shard
+
+# Kinds of work items produced by walk_tree
+kind_dir = "dir"  # A directory, yielded before anything inside it
+kind_page = "page"  # A markdown file under the content directory
+kind_asset = "asset"  # A file under the static directory
+
+
+# Class describing one entry found by walk_tree and where its output goes
+class WorkItem:
+    __slots__ = ("source", "dest", "kind", "entry")
+
+    def __init__(self, source, dest, kind, entry):
+        self.source = source
+        self.dest = dest
+        self.kind = kind
+        # The os.DirEntry the item came from; it caches its stat result after the first call
+        self.entry = entry
+
+    def stat(self):
+        # Stat the source at most once
+        return self.entry.stat()
+
+    def __repr__(self):
+        # Return a string representation of the WorkItem
+        return f"WorkItem({self.source}, {self.dest}, {self.kind})"
+
+
+# Function to lazily yield a WorkItem for every directory and file under source_root
+# Files are given file_kind; dest_suffix, if set, replaces the extension of file destinations
+# The walk is iterative (a stack of directory iterators) so deep trees can't hit the
+# recursion limit, and entries are visited in sorted order so builds are deterministic
+def walk_tree(source_root, dest_root, file_kind, dest_suffix=None):
+    stack = [(sorted_entries(source_root), dest_root)]
+    while stack:
+        entries, dest_dir = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        dest_path = os.path.join(dest_dir, entry.name)
+        # DirEntry.is_dir uses the file type from the directory listing, without a stat call
+        if entry.is_dir():
+            yield WorkItem(entry.path, dest_path, kind_dir, entry)
+            stack.append((sorted_entries(entry.path), dest_path))
+            continue
+        if dest_suffix is not None:
+            dest_path = os.path.splitext(dest_path)[0] + dest_suffix
+        yield WorkItem(entry.path, dest_path, file_kind, entry)
+
+
+# Function to list a directory's entries sorted by name, as an iterator
+def sorted_entries(dir_path):
+    with os.scandir(dir_path) as entries:
+        return iter(sorted(entries, key=lambda entry: entry.name))
+
+
+# Function to yield the pages under a content directory as WorkItems with .html destinations
+# With a shard (i, N), only the pages whose relative path hashes into shard i are yielded
+def walk_pages(dir_path_content, dest_dir_path, shard=None):
+    for item in walk_tree(dir_path_content, dest_dir_path, kind_page, ".html"):
+        if item.kind != kind_page:
+            continue
+        if shard is None or in_shard(os.path.relpath(item.source, dir_path_content), shard):
+            yield item
+
+
+# Function to yield the directories and files under a static directory as WorkItems
+def walk_assets(source_dir_path, dest_dir_path):
+    return walk_tree(source_dir_path, dest_dir_path, kind_asset)